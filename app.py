@@ -12,6 +12,9 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 import config
+from tabs import TABS, load_tab
+from utils.embeddings import start_warmup
+from utils.news_store import start_ingester
 
 # Page configuration
 st.set_page_config(
@@ -21,6 +24,12 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Load the embedding model in the background, so the first upload or chatbot question does not wait for it
+start_warmup()
+
+# Keep the local news store filled, so news searches rarely need a NewsAPI call
+start_ingester()
+
 # Initialize session state
 if "theme" not in st.session_state:
     st.session_state.theme = config.DEFAULT_THEME
@@ -99,30 +108,8 @@ with st.sidebar:
     
     selected = option_menu(
         menu_title=None,
-        options=[
-            "Pharma News",
-            "Research Papers",
-            "Analytics",
-            "Drug Info",
-            "Clinical Trials",
-            "Regulatory",
-            "Company News",
-            "Events",
-            "Company Knowledge",
-            "Chatbot"
-        ],
-        icons=[
-            "newspaper",
-            "journal-medical",
-            "bar-chart-line",
-            "capsule",
-            "clipboard2-pulse",
-            "shield-check",
-            "building",
-            "calendar-event",
-            "building-check",
-            "chat-dots"
-        ],
+        options=list(TABS),
+        icons=[icon for _, icon in TABS.values()],
         menu_icon="cast",
         default_index=0,
         styles={
@@ -142,46 +129,9 @@ with st.sidebar:
         }
     )
 
-# Route to tabs (renamed from pages to avoid Streamlit auto-detection)
-if selected == "Pharma News":
-    from tabs import pharma_news
-    pharma_news.show()
-    
-elif selected == "Research Papers":
-    from tabs import research_papers
-    research_papers.show()
-    
-elif selected == "Analytics":
-    from tabs import analytics
-    analytics.show()
-    
-elif selected == "Drug Info":
-    from tabs import drug_info
-    drug_info.show()
-    
-elif selected == "Clinical Trials":
-    from tabs import clinical_trials
-    clinical_trials.show()
-    
-elif selected == "Regulatory":
-    from tabs import regulatory
-    regulatory.show()
-    
-elif selected == "Company News":
-    from tabs import company_news
-    company_news.show()
-    
-elif selected == "Events":
-    from tabs import events
-    events.show()
-
-elif selected == "Company Knowledge":
-    from tabs import company_knowledge
-    company_knowledge.show()
-    
-elif selected == "Chatbot":
-    from tabs import chatbot
-    chatbot.show()
+# Route to tabs (renamed from pages to avoid Streamlit auto-detection).
+# Tab modules are imported on first visit, so heavy dependencies load lazily.
+load_tab(selected).show()
 
 # Footer
 st.markdown("---")
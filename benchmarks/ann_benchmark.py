@@ -0,0 +1,114 @@
+"""
+Compare knowledge-base index types on recall, latency, memory and build time
+
+Usage:
+    python benchmarks/ann_benchmark.py --vectors 200000 --dim 384
+    python benchmarks/ann_benchmark.py --npy embeddings.npy --types hnsw ivf_pq
+
+Recall@k is measured against exact (flat) search over the same vectors;
+IVF-PQ results are re-ranked by exact distance as the knowledge base does.
+Every index type is first checked to build on tiny corpora (below the IVF
+and PQ training minimums); the script exits 1 if one fails.
+Synthetic vectors are clustered rather than uniform, since uniformly random
+high-dimensional data is the worst case for every ANN index and does not
+resemble real sentence embeddings.
+"""
+import argparse
+import os
+import sys
+import time
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ann_index import INDEX_TYPES, build_index, index_type_of, search_index  # noqa: E402
+
+
+def synthetic_vectors(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def benchmark(vectors, queries, ground_truth, index_type, k):
+    start = time.perf_counter()
+    index = build_index(vectors, index_type)
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    found = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = search_index(index, query[None, :], k, lambda positions: vectors[positions])
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+
+    recall = np.mean([len(set(f) & set(g)) / k for f, g in zip(found, ground_truth)])
+    return {
+        "type": index_type_of(index),
+        "recall": recall,
+        "mean_ms": 1000 * np.mean(latencies),
+        "p95_ms": 1000 * np.percentile(latencies, 95),
+        "memory_mb": faiss.serialize_index(index).nbytes / 2**20,
+        "build_s": build_seconds,
+    }
+
+
+def check_small_corpora(dim: int, types) -> bool:
+    """Every index type must build and search on corpora too small to train IVF or PQ on"""
+    ok = True
+    for n in (1, 39, 100, 200, 255, 256):
+        vectors = synthetic_vectors(n, dim, clusters=max(1, n // 10), seed=n)
+        for index_type in types:
+            try:
+                index = build_index(vectors, index_type)
+                _, ids = index.search(vectors[:1], 1)
+                assert index.ntotal == n and ids[0][0] >= 0
+            except Exception as e:
+                print(f"{index_type} fails on {n} vectors: {e}")
+                ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--npy", help="float32 embedding matrix (n x dim) to use instead of synthetic vectors")
+    parser.add_argument("--vectors", type=int, default=100000, help="number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=384, help="synthetic vector dimension (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--clusters", type=int, default=1000, help="synthetic topic clusters")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4, help="chunks retrieved per question (retriever default: 4)")
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.npy:
+        vectors = np.ascontiguousarray(np.load(args.npy), dtype=np.float32)
+    else:
+        vectors = synthetic_vectors(args.vectors + args.queries, args.dim, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    query_rows = rng.choice(len(vectors), args.queries, replace=False)
+    queries = vectors[query_rows] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32)
+    vectors = np.delete(vectors, query_rows, axis=0)
+
+    if not check_small_corpora(vectors.shape[1], args.types):
+        sys.exit(1)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, ground_truth = exact.search(queries, args.k)
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, k={args.k}")
+    print(f"{'index':<10}{'recall@k':>10}{'mean ms':>10}{'p95 ms':>10}{'memory MB':>12}{'build s':>10}")
+    for index_type in args.types:
+        result = benchmark(vectors, queries, ground_truth, index_type, args.k)
+        print(
+            f"{result['type']:<10}{result['recall']:>10.3f}{result['mean_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+            f"{result['memory_mb']:>12.1f}{result['build_s']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Compare embedding backends on throughput and retrieval quality
+
+Usage:
+    python benchmarks/embedding_benchmark.py
+    python benchmarks/embedding_benchmark.py --corpus catalog.txt --backends torch onnx-int8
+
+Every backend embeds the same chunks (split as in ingestion). Quality is
+measured against the first backend listed (torch by default): the cosine
+similarity between the two backends' vectors for each chunk, and recall@k
+of each query's nearest chunks. The ONNX backends need
+``pip install "sentence-transformers[onnx]>=3.2"``.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+from utils.embeddings import BACKENDS, load_embedding_model  # noqa: E402
+
+_DRUGS = ["metformin", "atorvastatin", "amoxicillin", "lisinopril", "omeprazole", "sertraline", "ibuprofen", "insulin glargine"]
+_FACTS = [
+    "{drug} {strength} tablets are supplied in bottles of {count} (NDC {ndc}).",
+    "Store {drug} at 20-25°C; excursions permitted to 15-30°C.",
+    "The recommended starting dose of {drug} is {strength} once daily with food.",
+    "Common adverse reactions to {drug} include nausea, headache and dizziness.",
+    "{drug} is contraindicated in patients with known hypersensitivity to any component.",
+    "Each {drug} capsule contains {strength} of active ingredient and lactose monohydrate.",
+]
+
+
+def synthetic_corpus(n_chunks: int, seed: int):
+    """Product-catalog-like chunks, plus one query per chunk"""
+    rng = np.random.default_rng(seed)
+    chunks, queries = [], []
+    for i in range(n_chunks):
+        drug = _DRUGS[rng.integers(len(_DRUGS))]
+        values = {
+            "drug": drug,
+            "strength": f"{rng.choice([5, 10, 20, 250, 500, 850])} mg",
+            "count": int(rng.choice([30, 90, 500])),
+            "ndc": f"{rng.integers(1000, 9999):04d}-{rng.integers(100, 999)}-{rng.integers(10, 99)}",
+        }
+        sentences = [fact.format(**values) for fact in rng.permutation(_FACTS)[:4]]
+        chunks.append(f"Product sheet {i}. " + " ".join(sentences))
+        queries.append(f"What is the starting dose and storage of {drug}?")
+    return chunks, queries
+
+
+def file_corpus(path: str, n_queries: int, seed: int):
+    """Chunks of a text file; queries are random sentences taken from it"""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP)
+    chunks = splitter.split_text(text)
+    sentences = [s.strip() for s in text.replace("\n", " ").split(".") if len(s.strip()) > 30]
+    rng = np.random.default_rng(seed)
+    queries = [sentences[i] for i in rng.choice(len(sentences), min(n_queries, len(sentences)), replace=False)]
+    return chunks, queries
+
+
+def unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+def run_backend(backend: str, chunks, queries, batch_size: int):
+    start = time.perf_counter()
+    model = load_embedding_model(backend)
+    load_seconds = time.perf_counter() - start
+    model.embed_documents(chunks[:batch_size])  # warm-up, not timed
+
+    start = time.perf_counter()
+    vectors = []
+    for offset in range(0, len(chunks), batch_size):
+        vectors.extend(model.embed_documents(chunks[offset:offset + batch_size]))
+    embed_seconds = time.perf_counter() - start
+    query_vectors = [model.embed_query(query) for query in queries]
+    return {
+        "load_s": load_seconds,
+        "chunks_per_s": len(chunks) / embed_seconds,
+        "vectors": unit(vectors),
+        "queries": unit(query_vectors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", help="text file to chunk (default: synthetic product sheets)")
+    parser.add_argument("--chunks", type=int, default=2000, help="number of synthetic chunks")
+    parser.add_argument("--queries", type=int, default=200, help="queries sampled from --corpus")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--k", type=int, default=config.RETRIEVAL_K)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        chunks, queries = file_corpus(args.corpus, args.queries, args.seed)
+    else:
+        chunks, queries = synthetic_corpus(args.chunks, args.seed)
+    print(f"{config.EMBEDDING_MODEL}: {len(chunks)} chunks, {len(queries)} queries, k={args.k}")
+
+    results = {}
+    for backend in args.backends:
+        try:
+            results[backend] = run_backend(backend, chunks, queries, args.batch_size)
+        except Exception as e:
+            print(f"{backend}: unavailable ({e})")
+
+    if not results:
+        sys.exit(1)
+    reference_name = next(iter(results))
+    reference = results[reference_name]
+    reference_top = np.argsort(-(reference["queries"] @ reference["vectors"].T), axis=1)[:, :args.k]
+
+    print(f"{'backend':<12}{'load s':>8}{'chunks/s':>10}{'speed-up':>10}{'cosine vs ' + reference_name:>20}{'recall@k':>10}")
+    for backend, result in results.items():
+        cosine = float(np.mean(np.sum(result["vectors"] * reference["vectors"], axis=1)))
+        top = np.argsort(-(result["queries"] @ result["vectors"].T), axis=1)[:, :args.k]
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top, reference_top)])
+        print(
+            f"{backend:<12}{result['load_s']:>8.1f}{result['chunks_per_s']:>10.1f}"
+            f"{result['chunks_per_s'] / reference['chunks_per_s']:>9.2f}x{cosine:>20.4f}{recall:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
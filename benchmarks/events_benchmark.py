@@ -0,0 +1,322 @@
+"""
+Micro-benchmark of the Events tab article scoring
+
+Usage:
+    python benchmarks/events_benchmark.py --articles 2000
+
+Runs the Events scoring against the previous implementation (one
+substring test per keyword plus five date regexes per article, kept below
+as a reference) on the same synthetic news articles and reports
+articles/s for each. The "scoring" row compares one legacy filter run
+with score_article() over every article; the "3 tabs" row compares what
+one page view used to cost (one filter run per tab) with the single
+classify_events() pass that now feeds all three tabs. "cold" is the
+first pass over unseen articles, "warm" a rerun over the same articles
+(served by the keyword and event-date memos).
+
+The compiled matcher is not faster than one substring test per keyword
+on unseen text: cold runs are slower than the legacy filter (about
+0.5-0.9x here). The gain comes only from memo hits, i.e. Streamlit reruns
+over the same articles. Warm runs therefore only mean something while
+--articles fits in the keyword memo (EVENT_MATCHER.cache_size); beyond
+that the LRU evicts every text before it is seen again, and "warm" is
+cold. The script says so when --articles is too large. It also
+checks that the compiled matcher finds exactly the keywords that
+substring tests find; the selected events themselves differ since dates
+are now parsed rather than matched by year.
+"""
+import argparse
+import copy
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import event_dates  # noqa: E402
+from tabs.events import score_article, classify_events, EVENT_MATCHER, STRONG_EVENT_KEYWORDS, ACTION_KEYWORDS, DATE_KEYWORDS, EXCLUSION_KEYWORDS, PHARMA_KEYWORDS  # noqa: E402
+
+_FILLER = (
+    "the company said on tuesday that its new program will expand access for patients across "
+    "europe and asia while researchers continue to evaluate results from earlier studies"
+).split()
+
+
+def synthetic_articles(n: int, seed: int):
+    rng = random.Random(seed)
+    keywords = (
+        [kw for keywords in STRONG_EVENT_KEYWORDS.values() for kw in keywords]
+        + ACTION_KEYWORDS + DATE_KEYWORDS + EXCLUSION_KEYWORDS + PHARMA_KEYWORDS * 3
+        + ["March 15-17, 2026", "November 2027", "Sep 3-5, 2028", "2025"]
+    )
+    now = datetime.now(timezone.utc)
+    articles = []
+    for i in range(n):
+        words = [rng.choice(_FILLER) for _ in range(rng.randint(20, 60))]
+        for _ in range(rng.randint(0, 6)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        title, desc = " ".join(words[:12]).title(), " ".join(words[12:])
+        published = now - timedelta(days=rng.randint(0, 60), hours=rng.randint(0, 23))
+        articles.append({
+            "title": title,
+            "description": desc,
+            "url": f"https://news.example.com/{i}",
+            "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source": {"name": "Example"}
+        })
+    return articles
+
+
+# Previous implementation, kept verbatim for comparison
+
+def legacy_extract_dates_from_text(text):
+    """
+    Extract potential event dates from text.
+    Returns list of found dates and whether they're in the future.
+    """
+    text_lower = text.lower()
+    
+    # Pattern for dates like "March 15-17, 2026" or "November 2026"
+    date_patterns = [
+        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2}[-–]\d{1,2},?\s+202[6-9]',
+        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+202[6-9]',
+        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+202[6-9]',
+        r'202[6-9]',  # Just year
+        r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}[-–]\d{1,2},?\s+202[6-9]',
+    ]
+    
+    found_dates = []
+    for pattern in date_patterns:
+        matches = re.findall(pattern, text_lower)
+        found_dates.extend(matches)
+    
+    # Check if mentions future year
+    has_future_year = any(str(year) in text for year in [2026, 2027, 2028])
+    
+    return found_dates, has_future_year
+
+def legacy_smart_event_filter(articles, event_type="all", include_past=False):
+    """
+    Advanced filtering for actual events with multi-criteria scoring.
+    
+    event_type: "hackathon", "conference", "workshop", or "all"
+    include_past: If True, also include recent past events
+    """
+    
+    # Strong event indicators (high confidence these are actual events)
+    strong_event_keywords = {
+        "hackathon": [
+            "hackathon", "hack-a-thon", "coding competition", "coding challenge",
+            "innovation challenge", "dev challenge", "datathon"
+        ],
+        "conference": [
+            "conference", "summit", "symposium", "congress", "expo", "forum",
+            "annual meeting", "world congress", "international conference"
+        ],
+        "workshop": [
+            "workshop", "webinar", "training session", "masterclass", "bootcamp",
+            "short course", "hands-on training", "certification course"
+        ]
+    }
+    
+    # Action-oriented keywords (suggests it's an event you can attend/participate)
+    action_keywords = [
+        "register", "registration", "deadline", "apply", "submit", "join us",
+        "attend", "participate", "enroll", "spots available", "virtual event",
+        "in-person event", "hybrid event"
+    ]
+    
+    # Date-related keywords (confirms it's scheduled)
+    date_keywords = [
+        "scheduled for", "taking place", "to be held", "dates announced", 
+        "event date", "happening on", "2026", "2027"
+    ]
+    
+    # EXCLUDE these - they're news, not events
+    exclusion_keywords = [
+        "market report", "market analysis", "stock", "shares", "earnings",
+        "quarterly report", "revenue", "profit", "financial results",
+        "crime", "police", "lawsuit", "litigation", "cagr", "forecast", 
+        "market size", "merger", "acquisition", "dividend", "price target"
+    ]
+    
+    # Pharma-specific keywords to ensure relevance
+    pharma_keywords = [
+        "pharmaceutical", "pharma", "biotech", "drug", "clinical", "fda", 
+        "regulatory", "medicine", "therapy", "healthcare", "life sciences"
+    ]
+    
+    scored_events = []
+    current_date = datetime.now()
+    
+    for article in articles:
+        title = article.get("title", "").lower()
+        desc = (article.get("description", "") or "").lower()
+        combined_text = f"{title} {desc}"
+        
+        # Initialize score
+        score = 0
+        event_metadata = {
+            "is_future": False,
+            "is_past": False,
+            "has_dates": False,
+            "is_actionable": False,
+            "event_category": event_type
+        }
+        
+        # 1. CHECK FOR EXCLUSIONS (immediate disqualification)
+        if any(keyword in combined_text for keyword in exclusion_keywords):
+            continue
+        
+        # 2. CHECK PHARMA RELEVANCE
+        pharma_score = sum(1 for kw in pharma_keywords if kw in combined_text)
+        if pharma_score == 0:
+            continue  # Must be pharma-related
+        score += pharma_score * 2
+        
+        # 3. CHECK EVENT TYPE MATCH
+        if event_type != "all":
+            type_match = sum(1 for kw in strong_event_keywords[event_type] if kw in combined_text)
+            if type_match == 0:
+                continue  # Must match the event type
+            score += type_match * 10  # High weight
+        else:
+            # Check all types
+            for evt_type, keywords in strong_event_keywords.items():
+                type_match = sum(1 for kw in keywords if kw in combined_text)
+                if type_match > 0:
+                    score += type_match * 10
+                    event_metadata["event_category"] = evt_type
+                    break
+        
+        # 4. CHECK FOR ACTION KEYWORDS (suggests registration/participation)
+        action_score = sum(1 for kw in action_keywords if kw in combined_text)
+        if action_score > 0:
+            score += action_score * 5
+            event_metadata["is_actionable"] = True
+        
+        # 5. CHECK FOR DATE KEYWORDS
+        date_score = sum(1 for kw in date_keywords if kw in combined_text)
+        if date_score > 0:
+            score += date_score * 3
+            event_metadata["has_dates"] = True
+        
+        # 6. EXTRACT AND VALIDATE DATES
+        found_dates, has_future_year = legacy_extract_dates_from_text(combined_text)
+        if has_future_year:
+            score += 15  # Strong signal
+            event_metadata["is_future"] = True
+        
+        # 7. CHECK PUBLICATION DATE (recent articles more likely to be upcoming events)
+        try:
+            pub_date = datetime.fromisoformat(article.get("publishedAt", "").replace('Z', '+00:00'))
+            days_old = (current_date - pub_date).days
+            
+            if days_old <= 7:
+                score += 5  # Very recent
+                if not has_future_year and days_old <= 3:
+                    # Very recent article without future year might be a past event
+                    event_metadata["is_past"] = True
+            elif days_old <= 30:
+                score += 2  # Recent
+        except:
+            pass
+        
+        # 8. MINIMUM SCORE THRESHOLD
+        if score >= 15:  # Adjust threshold as needed
+            article["_score"] = score
+            article["_metadata"] = event_metadata
+            scored_events.append(article)
+    
+    # Sort by score (highest first)
+    scored_events.sort(key=lambda x: x["_score"], reverse=True)
+    
+    # Split into future and past
+    future_events = [e for e in scored_events if e["_metadata"]["is_future"]]
+    past_events = [e for e in scored_events if e["_metadata"]["is_past"] and include_past]
+    
+    return future_events, past_events
+
+
+def timed(fn, articles, event_type, repeat, cold=False):
+    best = float("inf")
+    for _ in range(repeat):
+        batch = copy.deepcopy(articles)
+        if cold:
+            EVENT_MATCHER.counts.cache_clear()
+            event_dates.clear_cache()
+        start = time.perf_counter()
+        result = fn(batch, event_type=event_type, include_past=True)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def legacy_three_tabs(articles, event_type=None, include_past=True):
+    return [legacy_smart_event_filter(articles, evt_type, include_past) for evt_type in STRONG_EVENT_KEYWORDS]
+
+
+def score_all(articles, event_type=None, include_past=True):
+    current_date = datetime.now(timezone.utc)
+    return [score_article(article, current_date) for article in articles]
+
+
+def one_pass(articles, event_type=None, include_past=True):
+    return classify_events(articles)
+
+
+def same_keywords(articles):
+    """Whether the compiled matcher agrees with one substring test per keyword on every article"""
+    keywords = list(EVENT_MATCHER.keyword_groups)
+    for article in articles:
+        text = f"{article['title'].lower()} {article['description'].lower()}"
+        if EVENT_MATCHER.keywords_in(text) != {keyword for keyword in keywords if keyword in text}:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=2000, help="keep within the keyword memo size for warm runs")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of this many runs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    articles = synthetic_articles(args.articles, args.seed)
+    print(f"{args.articles} articles, best of {args.repeat}")
+    if args.articles > EVENT_MATCHER.cache_size:
+        print(
+            f"Note: more articles than the keyword memo holds ({EVENT_MATCHER.cache_size}), "
+            "so warm runs are effectively cold"
+        )
+    print(f"{'pass':<12}{'legacy/s':>12}{'cold/s':>12}{'warm/s':>12}{'cold vs legacy':>16}{'warm vs legacy':>16}")
+
+    def report(label, legacy_seconds, cold_seconds, warm_seconds):
+        print(
+            f"{label:<12}{args.articles / legacy_seconds:>12.0f}{args.articles / cold_seconds:>12.0f}"
+            f"{args.articles / warm_seconds:>12.0f}{legacy_seconds / cold_seconds:>15.1f}x"
+            f"{legacy_seconds / warm_seconds:>15.1f}x"
+        )
+
+    report(
+        "scoring",
+        timed(legacy_smart_event_filter, articles, "all", args.repeat)[0],
+        timed(score_all, articles, None, args.repeat, cold=True)[0],
+        timed(score_all, articles, None, args.repeat)[0]
+    )
+    report(
+        "3 tabs",
+        timed(legacy_three_tabs, articles, None, args.repeat)[0],
+        timed(one_pass, articles, None, args.repeat, cold=True)[0],
+        timed(one_pass, articles, None, args.repeat)[0]
+    )
+
+    same = same_keywords(articles)
+    print(f"Matcher agrees with substring tests: {'yes' if same else 'NO'}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold-start import budget for the default (Pharma News) tab
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --tab "Company Knowledge" --budget-ms 0 --top 25
+
+Imports the tabs package and the tab in a fresh interpreter with
+``python -X importtime`` and fails (exit status 1) when the total import
+time exceeds the budget, or when any of the heavy ML / charting libraries
+is imported at all. The forbidden-module check is the reliable signal on
+noisy machines; pass --budget-ms 0 to only report timings.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only tabs that use them may import these
+HEAVY_MODULES = (
+    "langchain", "langchain_core", "langchain_community", "langchain_groq", "langchain_text_splitters",
+    "faiss", "torch", "sentence_transformers", "transformers", "pypdf", "groq", "numpy", "plotly", "pandas",
+)
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(tab: str):
+    """
+    (total microseconds, {module: (self us, cumulative us)}, modules loaded
+    beyond what streamlit itself imports) for importing a tab
+    """
+    code = (
+        "import json, sys, streamlit; before = set(sys.modules); "
+        f"import tabs; tabs.load_tab({tab!r}); "
+        "print(json.dumps(sorted(set(sys.modules) - before)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"Importing {tab!r} failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        modules[name] = (self_us, cumulative_us)
+        if len(indent) == 1:
+            # Top-level import: its cumulative time covers everything below it
+            total += cumulative_us
+    return total, modules, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tab", default="Pharma News", help="navigation label of the tab to import")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="maximum total import time (0: no limit)")
+    parser.add_argument("--runs", type=int, default=3, help="report the fastest of this many cold starts")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    total, modules, added = min((measure(args.tab) for _ in range(args.runs)), key=lambda run: run[0])
+
+    print(f"Cold import of {args.tab!r}: {total / 1000:.0f} ms ({len(modules)} modules)")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    failures = []
+    heavy = sorted(name for name in added if name in HEAVY_MODULES)
+    if heavy and args.tab == "Pharma News":
+        failures.append(f"heavy modules imported: {', '.join(heavy)}")
+    if args.budget_ms and total / 1000 > args.budget_ms:
+        failures.append(f"{total / 1000:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
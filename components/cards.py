@@ -35,8 +35,10 @@ def news_card(title: str, description: str, source: str, date: str, url: str):
     """, unsafe_allow_html=True)
 
 
-def paper_card(title: str, authors: str, journal: str, date: str, url: str):
+def paper_card(title: str, authors: str, journal: str, date: str, url: str, abstract: Optional[str] = None):
     """Display a research paper card"""
+    abstract_html = f'<div class="news-description">{abstract}</div>' if abstract else ''
+    
     st.markdown(f"""
     <div class="news-card fade-in">
         <div class="news-title">{title}</div>
@@ -47,6 +49,7 @@ def paper_card(title: str, authors: str, journal: str, date: str, url: str):
             <span style="color: #6366F1;">📚 {journal}</span> • 
             <span>📅 {date}</span>
         </div>
+        {abstract_html}
         <div style="margin-top: 0.75rem;">
             <a href="{url}" target="_blank" style="font-size: 0.9rem;">
                 View on PubMed →
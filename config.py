@@ -13,6 +13,7 @@ OPENFDA_BASE = "https://api.fda.gov/drug"
 CLINICALTRIALS_ENDPOINT = "https://clinicaltrials.gov/api/v2/studies"
 PUBMED_SEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 PUBMED_SUMMARY = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+PUBMED_FETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 GROQ_ENDPOINT = "https://api.groq.com/openai/v1/chat/completions"
 
 # API Keys (optional for most APIs)
@@ -20,6 +21,13 @@ NEWSAPI_KEY = os.getenv("NEWSAPI_KEY", "")
 OPENFDA_KEY = os.getenv("OPENFDA_KEY", "")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
+# ClinicalTrials.gov v2: only these fields are requested (the page renders nothing else)
+CLINICALTRIALS_FIELDS = ["NCTId", "BriefTitle", "OverallStatus", "Phase", "EnrollmentCount"]
+CLINICALTRIALS_MAX_PAGE_SIZE = 1000  # API maximum
+
+# PubMed result sets are read back from the E-utilities history server in pages of this size
+PUBMED_BATCH_SIZE = 200
+
 # Cache settings (in seconds)
 CACHE_TTL = {
     "news": 3600,           # 1 hour
@@ -30,10 +38,138 @@ CACHE_TTL = {
     "events": 604800        # 1 week
 }
 
+# Persistent cache shared by all server processes ("sqlite", "memory" or "none").
+# Point CACHE_DIR outside the checkout to keep the cache across deploys.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+CACHE_DB_PATH = os.path.join(CACHE_DIR, "fetch_cache.sqlite3")
+
+# Expired entries are served immediately while a background worker refreshes them,
+# for up to CACHE_STALE_WHILE_REVALIDATE seconds past their TTL. After that the
+# refetch is synchronous, but the last good payload is still served if the
+# upstream fails, for up to CACHE_STALE_IF_ERROR seconds past the TTL.
+CACHE_STALE_WHILE_REVALIDATE = 86400   # 1 day
+CACHE_STALE_IF_ERROR = 604800          # 1 week
+REFRESH_WORKERS = 4
+REFRESH_RETRY_AFTER = 60  # seconds to wait before retrying a failed background refresh
+
+# Local news store: a background ingester polls these NewsAPI queries into a SQLite
+# FTS5 index, and news searches are answered from it before NewsAPI is called.
+# Defaults spend at most 3 queries x 4 polls = 12 of the 100 daily developer-plan calls,
+# and nothing while nobody searches; the rest is left for searches the store cannot answer.
+NEWS_STORE_ENABLED = os.getenv("NEWS_STORE_ENABLED", "true").lower() == "true"
+NEWS_STORE_PATH = os.path.join(CACHE_DIR, "news_store.sqlite3")
+NEWS_INGEST_QUERIES = [
+    query.strip() for query in os.getenv(
+        "NEWS_INGEST_QUERIES",
+        "pharmaceutical,biotech,FDA approval"
+    ).split(",") if query.strip()
+]
+NEWS_INGEST_INTERVAL = int(os.getenv("NEWS_INGEST_INTERVAL", "21600"))  # seconds between polls of one query
+NEWS_INGEST_IDLE_AFTER = NEWS_INGEST_INTERVAL  # no polling once this process has had no news search for this long
+NEWS_INGEST_PAGE_SIZE = 100  # NewsAPI maximum
+NEWS_INGEST_CHECK_EVERY = 300  # seconds between checks for queries that are due
+NEWS_STORE_MAX_AGE_DAYS = 30  # same window as the NewsAPI searches; older articles are pruned
+NEWS_STORE_MAX_STALENESS = 2 * NEWS_INGEST_INTERVAL  # past this without an ingest, searches go to NewsAPI
+# A search with fewer local hits than the requested number of results also goes to NewsAPI
+NEWS_STORE_CANDIDATES = 200  # best BM25 matches re-ranked by recency
+NEWS_STORE_RECENCY_HALF_LIFE_DAYS = 7
+
 # Rate limiting
 REQUEST_TIMEOUT = 10  # seconds
 MAX_RETRIES = 3
 
+# Client-side pacing per upstream host (published limits, without API keys).
+# requests per `per` seconds; `burst` defaults to `requests`.
+# Buckets are per server process: N processes together may send N times these rates.
+RATE_LIMITS = {
+    "eutils.ncbi.nlm.nih.gov": {"requests": 3, "per": 1},       # 10/s with an NCBI API key
+    "api.fda.gov": {"requests": 240, "per": 60, "burst": 40},
+    "clinicaltrials.gov": {"requests": 50, "per": 60, "burst": 10},
+    # NewsAPI developer plan: 100 requests/day, shared with the news store ingester.
+    # Set these to your plan, divided by the number of server processes.
+    "newsapi.org": {
+        "requests": int(os.getenv("NEWSAPI_RATE_REQUESTS", "100")),
+        "per": int(os.getenv("NEWSAPI_RATE_PER", "86400")),
+        "burst": int(os.getenv("NEWSAPI_RATE_BURST", os.getenv("NEWSAPI_RATE_REQUESTS", "100")))
+    }
+}
+RATE_LIMIT_MAX_WAIT = 15  # seconds a request may queue for a token before giving up
+RATE_LIMIT_DEFAULT_BACKOFF = 5  # seconds to pause a host after a 429 without Retry-After
+
+# HTTP connection pooling (one keep-alive session per upstream host)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # connections kept per host
+HTTP_POOL_BLOCK = False  # open extra connections instead of waiting when the pool is busy
+HTTP_DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "PharmaKnowledgeHub/1.0"
+}
+
+# Analytics KPI sources are fetched concurrently; each has its own deadline (seconds)
+ANALYTICS_SOURCE_TIMEOUTS = {
+    "total_drugs": 8,
+    "active_trials": 8,
+    "recent_papers": 6,
+    "news_count": 10
+}
+
+# Company Knowledge (RAG) settings
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" (sentence-transformers default), "onnx" (ONNX Runtime) or "onnx-int8" (int8-quantized ONNX)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_qint8_avx2.onnx")
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"  # load the model at server start
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+KNOWLEDGE_INDEX_DIR = os.path.join(CACHE_DIR, "indexes")  # built FAISS indexes, keyed by content hash
+EMBEDDING_CACHE_DIR = os.path.join(CACHE_DIR, "embeddings")  # chunk vectors, keyed by model + text hash
+
+# Vector index type for the knowledge base: "auto", "flat", "hnsw", "ivf_flat" or "ivf_pq".
+# "auto" picks the first type whose chunk-count limit the corpus is under (ivf_pq beyond).
+ANN_INDEX_TYPE = os.getenv("ANN_INDEX_TYPE", "auto")
+ANN_AUTO_THRESHOLDS = [("flat", 50000), ("hnsw", 300000), ("ivf_flat", 1000000)]
+ANN_HNSW_M = 32
+ANN_HNSW_EF_CONSTRUCTION = 80
+ANN_HNSW_EF_SEARCH = 64
+ANN_IVF_NPROBE = 16
+ANN_PQ_M = 48  # sub-quantizers (bytes per vector) for IVF-PQ
+ANN_PQ_RERANK_FACTOR = 10  # IVF-PQ fetches this many times k candidates and re-ranks them by exact distance
+ANN_TRAIN_POINTS_PER_CENTROID = 39
+
+# Knowledge base retrieval: BM25 and vector rankings merged by reciprocal rank fusion
+RETRIEVAL_K = 4  # chunks passed to the LLM
+RETRIEVAL_FETCH_K = 20  # candidates taken from each ranking before fusion
+RRF_K = 60
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_MIN_IDF = 0.5  # query terms found in about two thirds of the chunks or more are ignored
+# Vector hits below this cosine similarity count as unrelated
+RETRIEVAL_SCORE_THRESHOLD = 0.2
+# Keyword-only hits below this BM25 score count as unrelated (about one term found in a quarter of the chunks)
+RETRIEVAL_LEXICAL_THRESHOLD = 1.0
+RETRIEVAL_USE_MMR = False  # re-rank fused candidates for diversity (maximal marginal relevance)
+RETRIEVAL_MMR_LAMBDA = 0.5  # 1 = relevance only, 0 = diversity only
+RETRIEVAL_MAX_CONTEXT_TOKENS = 1500  # chunks beyond this budget are left out of the prompt
+
+# Chatbot semantic answer cache
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+SEMANTIC_CACHE_TTL = 86400  # 24 hours
+SEMANTIC_CACHE_MAX_ENTRIES = 1000
+
+# Chatbot conversation context: newest turns within a token budget, older ones summarized
+CHAT_HISTORY_TOKEN_BUDGET = 2000
+CHAT_SUMMARY_MAX_TOKENS = 300
+CHAT_SUMMARY_MODEL = "llama-3.1-8b-instant"
+CHAT_SUMMARY_WORKERS = 2
+
+# Document ingestion pipeline
+INGEST_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))  # PDF parsing processes
+INGEST_PAGES_PER_TASK = 16
+INGEST_PARALLEL_MIN_PAGES = 32  # smaller PDFs are parsed in-process
+INGEST_TEXT_BLOCK_CHARS = 20000  # text files are read in blocks of about this size
+EMBEDDING_BATCH_SIZE = 64  # chunks embedded and added to the index at a time
+
 # UI Settings
 APP_TITLE = "Pharma Knowledge Hub"
 APP_ICON = "💊"
@@ -1,26 +1,38 @@
 """
-Tabs Package - Exports all tab modules
+Tabs Package - Lazy registry of the tab modules
+
+A tab's module (and whatever heavy libraries it pulls in, e.g. the
+langchain/FAISS/sentence-transformers stack behind Company Knowledge) is
+only imported the first time the tab is opened.
 """
-from . import analytics
-from . import chatbot
-from . import clinical_trials
-from . import company_knowledge
-from . import company_news
-from . import drug_info
-from . import events
-from . import pharma_news
-from . import regulatory
-from . import research_papers
+import importlib
+from types import ModuleType
+
+# Navigation label -> (module name, Bootstrap icon), in menu order
+TABS = {
+    "Pharma News": ("pharma_news", "newspaper"),
+    "Research Papers": ("research_papers", "journal-medical"),
+    "Analytics": ("analytics", "bar-chart-line"),
+    "Drug Info": ("drug_info", "capsule"),
+    "Clinical Trials": ("clinical_trials", "clipboard2-pulse"),
+    "Regulatory": ("regulatory", "shield-check"),
+    "Company News": ("company_news", "building"),
+    "Events": ("events", "calendar-event"),
+    "Company Knowledge": ("company_knowledge", "building-check"),
+    "Chatbot": ("chatbot", "chat-dots"),
+}
+
+__all__ = sorted(module for module, _ in TABS.values())
+
+
+def load_tab(label: str) -> ModuleType:
+    """Import (once) and return the module behind a navigation label"""
+    module, _ = TABS[label]
+    return importlib.import_module(f"{__name__}.{module}")
+
 
-__all__ = [
-    'analytics',
-    'chatbot',
-    'clinical_trials',
-    'company_knowledge',
-    'company_news',
-    'drug_info',
-    'events',
-    'pharma_news',
-    'regulatory',
-    'research_papers'
-]
+def __getattr__(name: str) -> ModuleType:
+    # Keeps `from tabs import pharma_news` working without eager imports
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
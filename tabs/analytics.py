@@ -2,14 +2,21 @@
 Analytics Dashboard Page
 """
 import streamlit as st
-from utils.data_fetchers import fetch_analytics_data, fetch_pharma_news, fetch_clinical_trials
+from utils.data_fetchers import fetch_analytics_data, fetch_analytics_metric, fetch_pharma_news, fetch_clinical_trials
+from utils.cache import invalidate, invalidate_source
 from components.cards import kpi_card
 from utils.formatters import format_number
+from typing import Optional
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
 
 
+def kpi_value(value: Optional[int]) -> str:
+    """Format a KPI, showing a placeholder when its source was unavailable"""
+    return format_number(value) if value is not None else "N/A"
+
+
 def show():
     st.markdown('<h2 class="gradient-header">📊 Analytics Dashboard</h2>', unsafe_allow_html=True)
     st.markdown("Real-time pharmaceutical industry metrics and insights")
@@ -26,31 +33,35 @@ def show():
     with col1:
         kpi_card(
             label="FDA Approved Drugs",
-            value=format_number(data.get("total_drugs", 0)),
+            value=kpi_value(data.get("total_drugs")),
             icon="💊"
         )
     
     with col2:
         kpi_card(
             label="Active Clinical Trials",
-            value=format_number(data.get("active_trials", 0)),
+            value=kpi_value(data.get("active_trials")),
             icon="🔬"
         )
     
     with col3:
         kpi_card(
             label="Research Papers (This Month)",
-            value=format_number(data.get("recent_papers", 0)),
+            value=kpi_value(data.get("recent_papers")),
             icon="📚"
         )
     
     with col4:
         kpi_card(
             label="News Articles (Today)",
-            value=format_number(data.get("news_count", 0)),
+            value=kpi_value(data.get("news_count")),
             icon="📰"
         )
     
+    unavailable = [source for source, value in data.items() if value is None]
+    if unavailable:
+        st.caption("⚠️ Some sources did not respond in time; their KPIs will load on the next refresh.")
+    
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Charts
@@ -182,5 +193,6 @@ def show():
     # Refresh button
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 Refresh Analytics", use_container_width=True):
-        st.cache_data.clear()
+        invalidate_source(fetch_analytics_metric)
+        invalidate(fetch_pharma_news, page_size=100)  # backs the news KPI
         st.rerun()
@@ -1,18 +1,83 @@
 """
 AI Chatbot Page
 """
+from typing import Iterator
 import streamlit as st
 from groq import Groq
+from utils.conversation import ConversationContext
+from utils.embeddings import get_embeddings_model
+from utils.semantic_cache import SemanticCache, question_with_context
 import config
 
 
-def get_groq_response(question: str, chat_history: list) -> str:
-    """Get response from Groq AI"""
+@st.cache_resource
+def get_groq_client() -> Groq:
+    """One Groq client per server process, so its HTTP connection pool is reused across questions"""
+    return Groq(api_key=config.GROQ_API_KEY)
+
+
+@st.cache_resource
+def get_answer_cache() -> SemanticCache:
+    """Process-wide cache of answers to semantically equivalent questions"""
+    # The embedding model is only loaded when the first question is asked
+    return SemanticCache(lambda text: get_embeddings_model().embed_query(text))
+
+
+def cached_question_vector(question: str, chat_history: list):
+    """Embedding used for the answer cache, or None if the embedding model is unavailable"""
+    try:
+        return get_answer_cache().vector(question_with_context(question, chat_history))
+    except Exception:
+        return None
+
+
+def get_conversation_context() -> ConversationContext:
+    """Token-budgeted context of this session's conversation"""
+    if "chat_context" not in st.session_state:
+        st.session_state.chat_context = ConversationContext()
+    return st.session_state.chat_context
+
+
+def summarize_conversation(previous_summary: str, messages: list) -> str:
+    """Fold older turns into the running summary (runs on a worker thread)"""
+    transcript = "\n".join(f"{msg['role'].title()}: {msg['content']}" for msg in messages)
+    response = get_groq_client().chat.completions.create(
+        model=config.CHAT_SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": "Summarize this pharma chatbot conversation for use as context in later turns. "
+                                          "Keep drug names, trial identifiers, numbers and the user's goals; drop pleasantries. "
+                                          "Extend the existing summary rather than repeating it."},
+            {"role": "user", "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"}
+        ],
+        temperature=0.2,
+        max_tokens=config.CHAT_SUMMARY_MAX_TOKENS
+    )
+    return response.choices[0].message.content
+
+
+def stream_groq_response(question: str, chat_history: list, context: ConversationContext = None) -> Iterator[str]:
+    """
+    Stream the response from Groq AI as it is generated.
+    
+    Closing the generator (e.g. the user stops or reruns the app mid-answer)
+    closes the HTTP stream, which ends generation on Groq's side.
+    Answers to near-duplicate questions come from the semantic answer cache;
+    only complete answers are cached.
+    """
+    stream = None
     try:
         if not config.GROQ_API_KEY:
-            return "⚠️ Please set your GROQ_API_KEY in the .env file to use the chatbot.\n\nGet a free API key at: https://console.groq.com/"
+            yield "⚠️ Please set your GROQ_API_KEY in the .env file to use the chatbot.\n\nGet a free API key at: https://console.groq.com/"
+            return
         
-        client = Groq(api_key=config.GROQ_API_KEY)
+        vector = cached_question_vector(question, chat_history)
+        if vector is not None:
+            cached = get_answer_cache().get(vector)
+            if cached is not None:
+                yield cached
+                return
+        
+        client = get_groq_client()
         
         # System prompt for pharma domain
         system_prompt = """You are a knowledgeable pharmaceutical AI assistant. You help users with:
@@ -26,28 +91,32 @@ def get_groq_response(question: str, chat_history: list) -> str:
         Provide accurate, helpful responses. If unsure, suggest reliable sources like PubMed, FDA.gov, or ClinicalTrials.gov.
         Keep responses concise but informative. Always remind users to consult healthcare professionals for medical advice."""
         
-        # Build messages
-        messages = [{"role": "system", "content": system_prompt}]
-        
-        # Add chat history
-        for msg in chat_history[-10:]:  # Last 10 messages for context
-            messages.append(msg)
+        # Build messages: summary of older turns plus the newest ones that fit the token budget
+        messages = (context or ConversationContext()).build_messages(system_prompt, chat_history, question)
         
-        # Add current question
-        messages.append({"role": "user", "content": question})
-        
-        # Get response
-        response = client.chat.completions.create(
+        # Stream response
+        stream = client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=messages,
             temperature=0.7,
-            max_tokens=1024
+            max_tokens=1024,
+            stream=True
         )
         
-        return response.choices[0].message.content
+        parts = []
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield parts[-1]
+        
+        if vector is not None and parts:
+            get_answer_cache().put(vector, question, "".join(parts))
         
     except Exception as e:
-        return f"❌ Error: {str(e)}\n\nPlease check your GROQ_API_KEY configuration."
+        yield f"❌ Error: {str(e)}\n\nPlease check your GROQ_API_KEY configuration."
+    finally:
+        if stream is not None:
+            stream.close()
 
 
 def show():
@@ -84,11 +153,14 @@ def show():
             "content": user_input
         })
         
-        # Get AI response
+        # Stream AI response into the chat bubble
         with st.chat_message("assistant", avatar="🤖"):
-            with st.spinner("Thinking..."):
-                response = get_groq_response(user_input, st.session_state.chat_history)
-            st.markdown(response)
+            chunks = stream_groq_response(user_input, st.session_state.chat_history, get_conversation_context())
+            try:
+                response = st.write_stream(chunks)
+            finally:
+                # Stops generation if the run is interrupted part-way
+                chunks.close()
         
         # Add to history
         st.session_state.chat_history.append({
@@ -96,6 +168,10 @@ def show():
             "content": response
         })
         
+        # Fold turns that no longer fit the budget into the summary, in the background
+        if config.GROQ_API_KEY:
+            get_conversation_context().schedule_summary(st.session_state.chat_history, summarize_conversation)
+        
         st.rerun()
     
     # Sidebar with example questions
@@ -120,7 +196,15 @@ def show():
         
         if st.button("🗑️ Clear Chat History", use_container_width=True, type="secondary"):
             st.session_state.chat_history = []
+            st.session_state.chat_context = ConversationContext()
             st.rerun()
+        
+        cache_stats = get_answer_cache().stats()
+        if cache_stats["hits"] + cache_stats["misses"]:
+            st.caption(
+                f"⚡ Answer cache: {cache_stats['hits']} hits / {cache_stats['hits'] + cache_stats['misses']} questions "
+                f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} cached"
+            )
     
     # Show placeholder if no messages
     if not st.session_state.chat_history:
@@ -3,6 +3,7 @@ Clinical Trials Page
 """
 import streamlit as st
 from utils.data_fetchers import fetch_clinical_trials
+from utils.cache import FetchFailed, invalidate
 import pandas as pd
 
 
@@ -23,7 +24,7 @@ def show():
     with col2:
         page_size = st.selectbox(
             "Results",
-            options=[5, 10, 20, 50],
+            options=[5, 10, 20, 50, 100],
             index=1,
             label_visibility="collapsed"
         )
@@ -32,7 +33,11 @@ def show():
     
     # Fetch trials
     with st.spinner("🔍 Searching clinical trials..."):
-        trials = fetch_clinical_trials(query=query, page_size=page_size)
+        try:
+            trials = fetch_clinical_trials(query=query, page_size=page_size)
+        except FetchFailed:
+            st.error("❌ ClinicalTrials.gov could not be reached. Please try again later.")
+            return
     
     if not trials:
         st.warning("⚠️ No trials found. Try a different search term.")
@@ -71,5 +76,5 @@ def show():
     # Refresh button
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 Refresh Results", use_container_width=True):
-        st.cache_data.clear()
+        invalidate(fetch_clinical_trials, query=query, page_size=page_size)
         st.rerun()
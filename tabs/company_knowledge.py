@@ -5,56 +5,143 @@ Company Knowledge Page (RAG)
 import streamlit as st
 import tempfile
 import os
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableBranch, RunnablePassthrough
+from utils.index_store import index_key, load_index, save_index
+from utils.ingestion import build_vector_store
+from utils.knowledge_base import KnowledgeBase, format_citation
+from utils.embeddings import get_embeddings_model
 import config
 
-# Initialize embeddings model only once
+NOT_FOUND_ANSWER = "Product information not found in the uploaded documents."
+
+# Strict System Prompt
+PROMPT_TEMPLATE = """
+Answer the questions based on the provided context only.
+If the answer is not in the context, reply exactly: "{not_found}"
+Do not hallucinate or use outside knowledge.
+
+<context>
+{context}
+</context>
+
+Question: {input}
+"""
+
 @st.cache_resource
-def get_embeddings_model():
-    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+def get_llm():
+    """Groq chat model shared by every session, so its HTTP connections are reused"""
+    return ChatGroq(
+        groq_api_key=config.GROQ_API_KEY,
+        model_name="llama-3.3-70b-versatile"
+    )
+
+def build_rag_chain(kb, settings):
+    """
+    Retrieval + answer chain over a knowledge base. Takes {"input": question}
+    and returns it with "docs" (the retrieved chunks) and "answer" added;
+    the LLM is only called when something was retrieved.
+    """
+    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE).partial(not_found=NOT_FOUND_ANSWER)
+    answer_chain = (
+        {"context": lambda x: format_docs(x["docs"]), "input": lambda x: x["input"]}
+        | prompt_template
+        | get_llm()
+        | StrOutputParser()
+    )
+    return (
+        RunnablePassthrough.assign(docs=lambda x: kb.search(x["input"], **settings))
+        | RunnablePassthrough.assign(answer=RunnableBranch(
+            # Nothing related in the documents: skip the LLM round trip
+            (lambda x: not x["docs"], lambda _: NOT_FOUND_ANSWER),
+            answer_chain
+        ))
+    )
+
+def get_rag_chain(kb, settings):
+    """The session's RAG chain, rebuilt only when the knowledge base or retrieval settings change"""
+    key = (id(kb), kb.version, tuple(sorted(settings.items())))
+    cached = st.session_state.get("kb_rag_chain")
+    if cached is None or cached[0] != key:
+        cached = st.session_state.kb_rag_chain = (key, build_rag_chain(kb, settings))
+    return cached[1]
+
+def retrieval_settings():
+    """Sidebar controls for retrieval, defaulting to the RETRIEVAL_* config values"""
+    with st.expander("⚙️ Retrieval Settings"):
+        k = st.slider("Chunks per answer (k)", 1, 10, config.RETRIEVAL_K, key="kb_k")
+        mmr = st.toggle("Diverse results (MMR)", value=config.RETRIEVAL_USE_MMR, key="kb_mmr")
+        mmr_lambda = st.slider(
+            "Relevance vs. diversity", 0.0, 1.0, config.RETRIEVAL_MMR_LAMBDA, 0.05,
+            key="kb_mmr_lambda", disabled=not mmr
+        )
+        score_threshold = st.slider(
+            "Minimum similarity", 0.0, 1.0, config.RETRIEVAL_SCORE_THRESHOLD, 0.05, key="kb_score_threshold"
+        )
+        lexical_threshold = st.slider(
+            "Minimum keyword score", 0.0, 5.0, config.RETRIEVAL_LEXICAL_THRESHOLD, 0.25, key="kb_lexical_threshold"
+        )
+        max_context_tokens = st.slider(
+            "Max context tokens", 250, 4000, config.RETRIEVAL_MAX_CONTEXT_TOKENS, 250, key="kb_max_context_tokens"
+        )
+    return {
+        "k": k,
+        "mmr": mmr,
+        "mmr_lambda": mmr_lambda,
+        "score_threshold": score_threshold,
+        "lexical_threshold": lexical_threshold,
+        "max_context_tokens": max_context_tokens
+    }
 
 def format_docs(docs):
-    """Format retrieved documents into a single context string."""
-    return "\n\n".join(doc.page_content for doc in docs)
+    """Format retrieved documents into a single context string, labelled with their source."""
+    return "\n\n".join(f"[Source: {format_citation(doc.metadata)}]\n{doc.page_content}" for doc in docs)
+
+def document_key(uploaded_file):
+    """Content key of an uploaded file (memoized per upload for the session)"""
+    keys = st.session_state.setdefault("kb_file_keys", {})
+    file_id = getattr(uploaded_file, "file_id", None) or uploaded_file.name
+    if file_id not in keys:
+        keys[file_id] = index_key(uploaded_file.getvalue(), uploaded_file.name.split('.')[-1])
+    return keys[file_id]
 
-def process_document(uploaded_file):
+def process_document(uploaded_file, progress=None, key=None):
     """
-    Process uploaded document into vector store
+    Process uploaded document into vector store.
+    Documents that were indexed before (same bytes and settings) are loaded from disk.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile (PDF or TXT)
+        progress: Optional callback(fraction_done, message)
+        key: Content key from document_key(), computed if not given
     """
     try:
+        file_type = uploaded_file.name.split('.')[-1]
+        key = key or index_key(uploaded_file.getvalue(), file_type)
+        embeddings = get_embeddings_model()
+        vector_store = load_index(key, embeddings)
+        if vector_store is not None:
+            return vector_store
+
         # Save temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_type}") as tmp_file:
             tmp_file.write(uploaded_file.getvalue())
             tmp_path = tmp_file.name
 
-        # Load document
-        if uploaded_file.name.endswith('.pdf'):
-            loader = PyPDFLoader(tmp_path)
-        else:
-            loader = TextLoader(tmp_path)
-            
-        docs = loader.load()
+        # Parse, split and embed in streaming batches
+        try:
+            vector_store, chunk_count = build_vector_store(tmp_path, embeddings, progress)
+        finally:
+            # Cleanup
+            os.unlink(tmp_path)
         
-        # Split text
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
-        final_documents = text_splitter.split_documents(docs)
-        
-        # Create vectors
-        embeddings = get_embeddings_model()
-        vector_store = FAISS.from_documents(final_documents, embeddings)
+        if vector_store is None:
+            st.error("No text could be extracted from this document.")
+            return None
         
-        # Cleanup
-        os.unlink(tmp_path)
+        save_index(key, vector_store, metadata={"chunks": chunk_count})
         
         return vector_store
         
@@ -62,38 +149,78 @@ def process_document(uploaded_file):
         st.error(f"Error processing document: {str(e)}")
         return None
 
+def sync_knowledge_base(uploaded_files):
+    """
+    Make the session's knowledge base hold exactly the uploaded files:
+    new files are indexed (or loaded from the index store) and appended,
+    files removed from the uploader have their vectors deleted.
+    """
+    uploaded = {document_key(f): f for f in uploaded_files or []}
+    kb = st.session_state.get("knowledge_base")
+    
+    if kb is not None:
+        for doc in kb.list_documents():
+            if doc["id"] not in uploaded:
+                kb.remove_document(doc["id"])
+    
+    new_files = [(key, f) for key, f in uploaded.items() if kb is None or key not in kb]
+    for key, uploaded_file in new_files:
+        with st.spinner(f"Processing {uploaded_file.name}..."):
+            progress_bar = st.progress(0.0, text="Reading document...")
+            vector_store = process_document(
+                uploaded_file,
+                progress=lambda fraction, message: progress_bar.progress(min(fraction, 1.0), text=message),
+                key=key
+            )
+            progress_bar.empty()
+        if vector_store:
+            if kb is None:
+                kb = st.session_state.knowledge_base = KnowledgeBase(get_embeddings_model())
+            kb.add_document(key, uploaded_file.name, vector_store)
+            st.success(f"✅ {uploaded_file.name} added to the knowledge base!")
+        else:
+            st.error(f"Failed to process {uploaded_file.name}.")
+    
+    return kb
+
 def show():
     st.markdown('<h2 class="gradient-header">🏢 Company Knowledge Base</h2>', unsafe_allow_html=True)
     st.markdown("Upload company documents (PDF/TXT) and ask questions about products.")
 
+    if "kb_uploader_key" not in st.session_state:
+        st.session_state.kb_uploader_key = 0
+
     # Sidebar for upload
     with st.sidebar:
         st.markdown("### 📂 Document Upload")
-        uploaded_file = st.file_uploader("Upload Product Catalog/Docs", type=['pdf', 'txt'])
+        uploaded_files = st.file_uploader(
+            "Upload Product Catalogs/Docs",
+            type=['pdf', 'txt'],
+            accept_multiple_files=True,
+            key=f"kb_uploader_{st.session_state.kb_uploader_key}"
+        )
         
         if st.button("🗑️ Clear Context", use_container_width=True):
-            if "vector_store" in st.session_state:
-                del st.session_state.vector_store
-            if "process_file" in st.session_state:
-                del st.session_state.process_file
+            for key in ("knowledge_base", "kb_rag_chain"):
+                st.session_state.pop(key, None)
+            # A fresh uploader widget, so the cleared files are not re-added
+            st.session_state.kb_uploader_key += 1
             st.rerun()
 
-    # Process File
-    if uploaded_file and ("process_file" not in st.session_state or st.session_state.process_file != uploaded_file.name):
-        with st.spinner("Processing document... (This typically takes 10-20 seconds)"):
-            vector_store = process_document(uploaded_file)
-            if vector_store:
-                st.session_state.vector_store = vector_store
-                st.session_state.process_file = uploaded_file.name
-                st.success("✅ Document processed successfully!")
-            else:
-                st.error("Failed to process document.")
+    # Process Files
+    kb = sync_knowledge_base(uploaded_files)
     
     # Check if context exists
-    if "vector_store" not in st.session_state:
+    if kb is None or len(kb) == 0:
         st.info("👈 Please upload a document in the sidebar to start chatting.")
         return
 
+    with st.sidebar:
+        st.markdown("### 📚 Knowledge Base")
+        for doc in kb.list_documents():
+            st.caption(f"📄 {doc['name']} · {doc['chunks']} chunks")
+        settings = retrieval_settings()
+
     # Chat Interface
     st.markdown("---")
     
@@ -105,9 +232,11 @@ def show():
     for message in st.session_state.rag_chat_history:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get("sources"):
+                st.caption("📎 Sources: " + "; ".join(message["sources"]))
 
     # Input
-    if prompt := st.chat_input("Ask about products in the document..."):
+    if prompt := st.chat_input("Ask about products in the documents..."):
         # User message
         st.session_state.rag_chat_history.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
@@ -115,42 +244,17 @@ def show():
 
         # AI Response
         with st.chat_message("assistant"):
-            with st.spinner("Analyzing document..."):
+            with st.spinner("Analyzing documents..."):
                 try:
-                    llm = ChatGroq(
-                        groq_api_key=config.GROQ_API_KEY,
-                        model_name="llama-3.3-70b-versatile"
-                    )
-                    
-                    # Strict System Prompt
-                    prompt_template = ChatPromptTemplate.from_template(
-                        """
-                        Answer the questions based on the provided context only.
-                        If the answer is not in the context, reply exactly: "Product information not found in the uploaded document."
-                        Do not hallucinate or use outside knowledge.
-                        
-                        <context>
-                        {context}
-                        </context>
-                        
-                        Question: {input}
-                        """
-                    )
-                    
-                    # Build LCEL retrieval chain (replaces deprecated create_stuff_documents_chain / create_retrieval_chain)
-                    retriever = st.session_state.vector_store.as_retriever()
-                    
-                    rag_chain = (
-                        {"context": retriever | format_docs, "input": RunnablePassthrough()}
-                        | prompt_template
-                        | llm
-                        | StrOutputParser()
-                    )
-                    
-                    answer = rag_chain.invoke(prompt)
+                    # Hybrid lexical + vector retrieval first, so the answer can cite the chunks it was given
+                    result = get_rag_chain(kb, settings).invoke({"input": prompt})
+                    answer, docs = result["answer"], result["docs"]
+                    sources = list(dict.fromkeys(format_citation(doc.metadata) for doc in docs))
                     
                     st.markdown(answer)
-                    st.session_state.rag_chat_history.append({"role": "assistant", "content": answer})
+                    if sources:
+                        st.caption("📎 Sources: " + "; ".join(sources))
+                    st.session_state.rag_chat_history.append({"role": "assistant", "content": answer, "sources": sources})
                     
                 except Exception as e:
                     st.error(f"Error generating response: {str(e)}")
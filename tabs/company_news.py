@@ -2,7 +2,8 @@
 Company News Page
 """
 import streamlit as st
-from utils.data_fetchers import fetch_company_news
+from utils.data_fetchers import fetch_company_news, fetch_pharma_news, company_news_query
+from utils.cache import FetchFailed, invalidate
 from components.cards import news_card
 from utils.formatters import truncate_text
 from datetime import datetime
@@ -31,9 +32,14 @@ def show():
             label_visibility="collapsed"
         )
     
-    # Fetch company news
+    # Fetch company news (local news store first)
     with st.spinner(f"🔍 Fetching news for {selected_company}..."):
-        articles = fetch_company_news(company=selected_company, page_size=page_size)
+        refresh = st.session_state.pop("company_news_refresh", False)
+        try:
+            articles = fetch_company_news(company=selected_company, page_size=page_size, refresh=refresh)
+        except FetchFailed:
+            st.error("❌ NewsAPI could not be reached. Please try again later.")
+            return
     
     if not articles:
         st.warning(f"⚠️ No recent news found for {selected_company}. Try another company or check your API key.")
@@ -89,5 +95,6 @@ def show():
     # Refresh button
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 Refresh News", use_container_width=True):
-        st.cache_data.clear()
+        invalidate(fetch_pharma_news, query=company_news_query(selected_company), page_size=page_size)
+        st.session_state.company_news_refresh = True
         st.rerun()
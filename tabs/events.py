@@ -2,179 +2,222 @@
 Events Page - Improved Dynamic Events with Multi-Source Fetching
 """
 import streamlit as st
-from utils.data_fetchers import fetch_pharma_news_multi_query
+from utils.data_fetchers import fetch_pharma_news, fetch_pharma_news_multi_query
+from utils.cache import invalidate
 from components.cards import news_card
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from utils.formatters import truncate_text
-import re
+from utils.keyword_matcher import KeywordMatcher
+from utils.event_dates import cached_event_dates, decisive_dates, format_event_date
+import config
 
-def extract_dates_from_text(text):
+# One broad query for all event tabs; articles are sorted into tabs locally
+EVENT_QUERY = (
+    '(hackathon OR datathon OR "coding competition" OR "innovation challenge"'
+    ' OR conference OR summit OR congress OR symposium'
+    ' OR workshop OR webinar OR training OR "certification course")'
+    ' AND (pharmaceutical OR biotech OR healthcare OR "drug discovery" OR "clinical trials"'
+    ' OR FDA OR "regulatory affairs" OR GMP)'
+)
+EVENT_PAGE_SIZE = 100  # NewsAPI maximum; the single query feeds all three tabs
+# Events that ended within this many days count as "recent past"
+RECENT_PAST_DAYS = 90
+
+# Strong event indicators (high confidence these are actual events)
+STRONG_EVENT_KEYWORDS = {
+    "hackathon": [
+        "hackathon", "hack-a-thon", "coding competition", "coding challenge",
+        "innovation challenge", "dev challenge", "datathon"
+    ],
+    "conference": [
+        "conference", "summit", "symposium", "congress", "expo", "forum",
+        "annual meeting", "world congress", "international conference"
+    ],
+    "workshop": [
+        "workshop", "webinar", "training session", "masterclass", "bootcamp",
+        "short course", "hands-on training", "certification course"
+    ]
+}
+
+# Action-oriented keywords (suggests it's an event you can attend/participate)
+ACTION_KEYWORDS = [
+    "register", "registration", "deadline", "apply", "submit", "join us",
+    "attend", "participate", "enroll", "spots available", "virtual event",
+    "in-person event", "hybrid event"
+]
+
+# Date-related keywords (confirms it's scheduled)
+DATE_KEYWORDS = [
+    "scheduled for", "taking place", "to be held", "dates announced", 
+    "event date", "happening on"
+]
+
+# EXCLUDE these - they're news, not events
+EXCLUSION_KEYWORDS = [
+    "market report", "market analysis", "stock", "shares", "earnings",
+    "quarterly report", "revenue", "profit", "financial results",
+    "crime", "police", "lawsuit", "litigation", "cagr", "forecast", 
+    "market size", "merger", "acquisition", "dividend", "price target"
+]
+
+# Pharma-specific keywords to ensure relevance
+PHARMA_KEYWORDS = [
+    "pharmaceutical", "pharma", "biotech", "drug", "clinical", "fda", 
+    "regulatory", "medicine", "therapy", "healthcare", "life sciences"
+]
+
+# Every keyword list above, compiled once into a single-pass matcher
+EVENT_MATCHER = KeywordMatcher({
+    **STRONG_EVENT_KEYWORDS,
+    "action": ACTION_KEYWORDS,
+    "date": DATE_KEYWORDS,
+    "exclusion": EXCLUSION_KEYWORDS,
+    "pharma": PHARMA_KEYWORDS
+})
+
+def parse_published(article):
+    """Publication time of an article as an aware UTC datetime, or None"""
+    try:
+        published = datetime.fromisoformat(article.get("publishedAt", "").replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    return published if published.tzinfo else published.replace(tzinfo=timezone.utc)
+
+def score_article(article, current_date):
     """
-    Extract potential event dates from text.
-    Returns list of found dates and whether they're in the future.
+    Score an article on everything except its event type.
+    Returns (score, {event type: keyword matches}, metadata), or None when
+    the article is excluded or not pharma-related. The text is scanned once
+    by EVENT_MATCHER for all keyword categories, and the event dates it
+    mentions decide whether the event is upcoming or past.
     """
-    text_lower = text.lower()
+    today = current_date.date()
+    title = article.get("title", "").lower()
+    desc = (article.get("description", "") or "").lower()
+    combined_text = f"{title} {desc}"
     
-    # Pattern for dates like "March 15-17, 2026" or "November 2026"
-    date_patterns = [
-        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2}[-–]\d{1,2},?\s+202[6-9]',
-        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+\d{1,2},?\s+202[6-9]',
-        r'(january|february|march|april|may|june|july|august|september|october|november|december)\s+202[6-9]',
-        r'202[6-9]',  # Just year
-        r'(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+\d{1,2}[-–]\d{1,2},?\s+202[6-9]',
-    ]
+    # Initialize score
+    score = 0
+    event_metadata = {
+        "is_future": False,
+        "is_past": False,
+        "has_dates": False,
+        "is_actionable": False,
+        "event_category": "all",
+        "event_dates": []
+    }
     
-    found_dates = []
-    for pattern in date_patterns:
-        matches = re.findall(pattern, text_lower)
-        found_dates.extend(matches)
+    counts = EVENT_MATCHER.counts(combined_text)
     
-    # Check if mentions future year
-    has_future_year = any(str(year) in text for year in [2026, 2027, 2028])
+    # 1. CHECK FOR EXCLUSIONS (immediate disqualification)
+    if counts["exclusion"]:
+        return None
     
-    return found_dates, has_future_year
-
-def smart_event_filter(articles, event_type="all", include_past=False):
-    """
-    Advanced filtering for actual events with multi-criteria scoring.
+    # 2. CHECK PHARMA RELEVANCE
+    pharma_score = counts["pharma"]
+    if pharma_score == 0:
+        return None  # Must be pharma-related
+    score += pharma_score * 2
     
-    event_type: "hackathon", "conference", "workshop", or "all"
-    include_past: If True, also include recent past events
-    """
+    # 3. EVENT TYPE MATCHES (weighted by the caller)
+    type_matches = {evt_type: counts[evt_type] for evt_type in STRONG_EVENT_KEYWORDS}
     
-    # Strong event indicators (high confidence these are actual events)
-    strong_event_keywords = {
-        "hackathon": [
-            "hackathon", "hack-a-thon", "coding competition", "coding challenge",
-            "innovation challenge", "dev challenge", "datathon"
-        ],
-        "conference": [
-            "conference", "summit", "symposium", "congress", "expo", "forum",
-            "annual meeting", "world congress", "international conference"
-        ],
-        "workshop": [
-            "workshop", "webinar", "training session", "masterclass", "bootcamp",
-            "short course", "hands-on training", "certification course"
-        ]
-    }
+    # 4. CHECK FOR ACTION KEYWORDS (suggests registration/participation)
+    action_score = counts["action"]
+    if action_score > 0:
+        score += action_score * 5
+        event_metadata["is_actionable"] = True
     
-    # Action-oriented keywords (suggests it's an event you can attend/participate)
-    action_keywords = [
-        "register", "registration", "deadline", "apply", "submit", "join us",
-        "attend", "participate", "enroll", "spots available", "virtual event",
-        "in-person event", "hybrid event"
-    ]
+    # 5. CHECK FOR DATE KEYWORDS
+    date_score = counts["date"]
+    if date_score > 0:
+        score += date_score * 3
+        event_metadata["has_dates"] = True
     
-    # Date-related keywords (confirms it's scheduled)
-    date_keywords = [
-        "scheduled for", "taking place", "to be held", "dates announced", 
-        "event date", "happening on", "2026", "2027"
-    ]
+    # 6. EXTRACT EVENT DATES (memoized per article, so reruns skip parsing)
+    pub_date = parse_published(article)
+    event_dates = cached_event_dates(
+        article.get("url", ""), combined_text, pub_date.date() if pub_date else today
+    )
+    if event_dates:
+        event_metadata["has_dates"] = True
+    # Vaguer dates only count when the article gives no exact day
+    event_dates = decisive_dates(event_dates, today)
+    upcoming = sorted((d for d in event_dates if d.end >= today), key=lambda d: d.start)
+    if upcoming:
+        score += 15  # Strong signal
+        event_metadata["is_future"] = True
+        event_metadata["event_dates"] = upcoming
+    elif event_dates:
+        last = max(event_dates, key=lambda d: d.end)
+        if last.end >= today - timedelta(days=RECENT_PAST_DAYS):
+            event_metadata["is_past"] = True
+            event_metadata["event_dates"] = [last]
     
-    # EXCLUDE these - they're news, not events
-    exclusion_keywords = [
-        "market report", "market analysis", "stock", "shares", "earnings",
-        "quarterly report", "revenue", "profit", "financial results",
-        "crime", "police", "lawsuit", "litigation", "cagr", "forecast", 
-        "market size", "merger", "acquisition", "dividend", "price target"
-    ]
+    # 7. CHECK PUBLICATION DATE (recent articles more likely to be upcoming events)
+    if pub_date is not None:
+        days_old = (current_date - pub_date).days
+        
+        if days_old <= 7:
+            score += 5  # Very recent
+            if not event_dates and days_old <= 3:
+                # Very recent article without any event date might be a past event
+                event_metadata["is_past"] = True
+        elif days_old <= 30:
+            score += 2  # Recent
     
-    # Pharma-specific keywords to ensure relevance
-    pharma_keywords = [
-        "pharmaceutical", "pharma", "biotech", "drug", "clinical", "fda", 
-        "regulatory", "medicine", "therapy", "healthcare", "life sciences"
-    ]
+    return score, type_matches, event_metadata
+
+def classify_events(articles):
+    """
+    One dedup and scoring pass over a combined feed. An article goes into
+    every event type it matches (with that type's score), e.g. a
+    conference that runs workshops shows up in both tabs.
     
-    scored_events = []
-    current_date = datetime.now()
+    Returns {event type: {"upcoming": [...], "past": [...]}}, each list
+    sorted by score (highest first). Articles are copied, not modified.
+    """
+    feed = {evt_type: {"upcoming": [], "past": []} for evt_type in STRONG_EVENT_KEYWORDS}
+    current_date = datetime.now(timezone.utc)
+    seen_urls = set()
     
     for article in articles:
-        title = article.get("title", "").lower()
-        desc = (article.get("description", "") or "").lower()
-        combined_text = f"{title} {desc}"
-        
-        # Initialize score
-        score = 0
-        event_metadata = {
-            "is_future": False,
-            "is_past": False,
-            "has_dates": False,
-            "is_actionable": False,
-            "event_category": event_type
-        }
-        
-        # 1. CHECK FOR EXCLUSIONS (immediate disqualification)
-        if any(keyword in combined_text for keyword in exclusion_keywords):
+        # Remove duplicates based on URL
+        url = article.get("url", "")
+        if not url or url in seen_urls:
             continue
+        seen_urls.add(url)
         
-        # 2. CHECK PHARMA RELEVANCE
-        pharma_score = sum(1 for kw in pharma_keywords if kw in combined_text)
-        if pharma_score == 0:
-            continue  # Must be pharma-related
-        score += pharma_score * 2
-        
-        # 3. CHECK EVENT TYPE MATCH
-        if event_type != "all":
-            type_match = sum(1 for kw in strong_event_keywords[event_type] if kw in combined_text)
-            if type_match == 0:
-                continue  # Must match the event type
-            score += type_match * 10  # High weight
-        else:
-            # Check all types
-            for evt_type, keywords in strong_event_keywords.items():
-                type_match = sum(1 for kw in keywords if kw in combined_text)
-                if type_match > 0:
-                    score += type_match * 10
-                    event_metadata["event_category"] = evt_type
-                    break
-        
-        # 4. CHECK FOR ACTION KEYWORDS (suggests registration/participation)
-        action_score = sum(1 for kw in action_keywords if kw in combined_text)
-        if action_score > 0:
-            score += action_score * 5
-            event_metadata["is_actionable"] = True
-        
-        # 5. CHECK FOR DATE KEYWORDS
-        date_score = sum(1 for kw in date_keywords if kw in combined_text)
-        if date_score > 0:
-            score += date_score * 3
-            event_metadata["has_dates"] = True
-        
-        # 6. EXTRACT AND VALIDATE DATES
-        found_dates, has_future_year = extract_dates_from_text(combined_text)
-        if has_future_year:
-            score += 15  # Strong signal
-            event_metadata["is_future"] = True
-        
-        # 7. CHECK PUBLICATION DATE (recent articles more likely to be upcoming events)
-        try:
-            pub_date = datetime.fromisoformat(article.get("publishedAt", "").replace('Z', '+00:00'))
-            days_old = (current_date - pub_date).days
-            
-            if days_old <= 7:
-                score += 5  # Very recent
-                if not has_future_year and days_old <= 3:
-                    # Very recent article without future year might be a past event
-                    event_metadata["is_past"] = True
-            elif days_old <= 30:
-                score += 2  # Recent
-        except:
-            pass
+        scored = score_article(article, current_date)
+        if scored is None:
+            continue
+        score, type_matches, event_metadata = scored
         
-        # 8. MINIMUM SCORE THRESHOLD
-        if score >= 15:  # Adjust threshold as needed
-            article["_score"] = score
-            article["_metadata"] = event_metadata
-            scored_events.append(article)
-    
-    # Sort by score (highest first)
-    scored_events.sort(key=lambda x: x["_score"], reverse=True)
+        for evt_type, type_match in type_matches.items():
+            type_score = score + type_match * 10
+            if type_match == 0 or type_score < 15:
+                continue
+            event = {**article, "_score": type_score, "_metadata": {**event_metadata, "event_category": evt_type}}
+            if event_metadata["is_future"]:
+                feed[evt_type]["upcoming"].append(event)
+            elif event_metadata["is_past"]:
+                feed[evt_type]["past"].append(event)
     
-    # Split into future and past
-    future_events = [e for e in scored_events if e["_metadata"]["is_future"]]
-    past_events = [e for e in scored_events if e["_metadata"]["is_past"] and include_past]
-    
-    return future_events, past_events
+    for buckets in feed.values():
+        for events in buckets.values():
+            events.sort(key=lambda x: x["_score"], reverse=True)
+    return feed
+
+@st.cache_data(ttl=config.CACHE_TTL["news"], show_spinner=False, max_entries=4)
+def cached_event_feed(articles):
+    """classify_events() for one fetched feed, shared by all three tabs and every rerun"""
+    return classify_events(articles)
+
+def load_event_feed():
+    """The classified events behind every tab: one NewsAPI query, one scoring pass"""
+    articles = fetch_pharma_news_multi_query(base_query=EVENT_QUERY, page_size=EVENT_PAGE_SIZE)
+    # None when NewsAPI failed: classify an empty feed rather than crash every tab
+    return cached_event_feed(articles or [])
 
 def show():
     st.markdown('<h2 class="gradient-header">📅 Pharma Events & Opportunities</h2>', unsafe_allow_html=True)
@@ -186,40 +229,24 @@ def show():
         show_past = st.checkbox("📜 Include Recent Past Events", value=True)
     with col2:
         if st.button("🔄 Refresh", use_container_width=True):
-            st.cache_data.clear()
+            invalidate(fetch_pharma_news, query=EVENT_QUERY, page_size=EVENT_PAGE_SIZE)
             st.rerun()
     
+    # One fetch and one classification pass, read by all three tabs
+    with st.spinner("🔍 Searching global news for events..."):
+        try:
+            feed = load_event_feed()
+        except Exception as e:
+            st.error(f"Error fetching events: {str(e)}")
+            return
+    
     tab1, tab2, tab3 = st.tabs(["🏆 Hackathons", "🎤 Conferences", "🎓 Workshops"])
     
 
-    # Helper function to fetch and display
-    def fetch_and_display(query, event_type, tab_name, icon="📅"):
-        all_articles = []
-        
-        with st.spinner(f"🔍 Searching global news for {tab_name}..."):
-            # Single robust query fetch
-            try:
-                # Use a larger page size since we are doing one big query
-                all_articles = fetch_pharma_news_multi_query(base_query=query, page_size=50)
-            except Exception as e:
-                st.error(f"Error fetching {tab_name}: {str(e)}")
-                return
-            
-            # Remove duplicates based on URL
-            seen_urls = set()
-            unique_articles = []
-            for article in all_articles:
-                url = article.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    unique_articles.append(article)
-            
-            # Apply smart filtering
-            future_events, past_events = smart_event_filter(
-                unique_articles, 
-                event_type=event_type,
-                include_past=show_past
-            )
+    # Helper function to display one event type
+    def display_events(event_type, tab_name, icon="📅"):
+        future_events = feed[event_type]["upcoming"]
+        past_events = feed[event_type]["past"] if show_past else []
         
         # Display results
         if future_events:
@@ -255,32 +282,29 @@ def show():
             except:
                 formatted_date = published_at
             
+            event_dates = article.get("_metadata", {}).get("event_dates")
+            when = f"📅 {format_event_date(event_dates[0])} · " if event_dates else ""
+            
             news_card(
                 title=f"{icon} {title}",
                 description=truncate_text(description, 250),
                 source=source,
-                date=f"Published: {formatted_date}",
+                date=f"{when}Published: {formatted_date}",
                 url=url
             )
 
     # TAB 1: HACKATHONS
     with tab1:
         st.markdown("### 💻 Pharma & Healthcare Hackathons")
-        # Combined Master Query
-        hackathon_query = '(hackathon OR "coding competition" OR "innovation challenge" OR datathon) AND ("pharmaceutical" OR "biotech" OR "healthcare" OR "drug discovery")'
-        fetch_and_display(hackathon_query, "hackathon", "hackathons", "🚀")
+        display_events("hackathon", "hackathons", "🚀")
     
     # TAB 2: CONFERENCES
     with tab2:
         st.markdown("### 🎤 Industry Conferences & Summits")
-        # Combined Master Query
-        conference_query = '(conference OR summit OR congress OR symposium) AND ("pharmaceutical" OR "biotech" OR "clinical trials") AND (2026 OR 2027)'
-        fetch_and_display(conference_query, "conference", "conferences", "🗓️")
+        display_events("conference", "conferences", "🗓️")
     
     # TAB 3: WORKSHOPS
     with tab3:
         st.markdown("### 🎓 Training, Workshops & Webinars")
-        # Combined Master Query
-        workshop_query = '(workshop OR webinar OR training OR "certification course") AND (FDA OR "regulatory affairs" OR "clinical trials" OR GMP)'
-        fetch_and_display(workshop_query, "workshop", "workshops", "🎓")
+        display_events("workshop", "workshops", "🎓")
 
@@ -2,7 +2,8 @@
 Pharma News Page
 """
 import streamlit as st
-from utils.data_fetchers import fetch_pharma_news
+from utils.data_fetchers import fetch_pharma_news, search_pharma_news
+from utils.cache import FetchFailed, invalidate
 from components.cards import news_card, loading_skeleton
 from utils.formatters import truncate_text
 from datetime import datetime
@@ -32,9 +33,14 @@ def show():
     
     query = search_query if search_query else "pharmaceutical drug"
     
-    # Fetch news
+    # Search the local news store; NewsAPI only when it cannot answer (or on refresh)
+    refresh = st.session_state.pop("pharma_news_refresh", False)
     with st.spinner("🔍 Fetching latest pharma news..."):
-        articles = fetch_pharma_news(query=query, page_size=page_size)
+        try:
+            articles = search_pharma_news(query, page_size=page_size, refresh=refresh)
+        except FetchFailed:
+            st.error("❌ NewsAPI could not be reached. Please try again later.")
+            return
     
     if not articles:
         st.warning("⚠️ No news articles found. Try a different search term or check your API key.")
@@ -79,5 +85,6 @@ def show():
     # Refresh button
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 Refresh News", use_container_width=True):
-        st.cache_data.clear()
+        invalidate(fetch_pharma_news, query=query, page_size=page_size)
+        st.session_state.pharma_news_refresh = True
         st.rerun()
@@ -3,6 +3,7 @@ Regulatory Updates Page
 """
 import streamlit as st
 from utils.data_fetchers import fetch_regulatory_updates
+from utils.cache import FetchFailed, invalidate_source
 from utils.formatters import format_date
 
 
@@ -12,7 +13,11 @@ def show():
     
     # Fetch regulatory data
     with st.spinner("🔍 Fetching FDA updates..."):
-        updates = fetch_regulatory_updates(limit=20)
+        try:
+            updates = fetch_regulatory_updates(limit=20)
+        except FetchFailed:
+            st.error("❌ OpenFDA could not be reached. Please try again later.")
+            return
     
     if not updates:
         st.warning("⚠️ No regulatory updates found.")
@@ -79,5 +84,5 @@ def show():
     
     # Refresh button
     if st.button("🔄 Refresh Updates", use_container_width=True):
-        st.cache_data.clear()
+        invalidate_source(fetch_regulatory_updates)
         st.rerun()
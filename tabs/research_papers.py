@@ -1,9 +1,12 @@
 """
 Research Papers Page
 """
+import html
 import streamlit as st
 from utils.data_fetchers import fetch_research_papers
+from utils.cache import FetchFailed, invalidate
 from components.cards import paper_card
+from utils.formatters import truncate_text
 
 
 def show():
@@ -23,7 +26,7 @@ def show():
     with col2:
         max_results = st.selectbox(
             "Results",
-            options=[5, 10, 20, 50],
+            options=[5, 10, 20, 50, 100],
             index=1,
             label_visibility="collapsed"
         )
@@ -32,7 +35,11 @@ def show():
     
     # Fetch papers
     with st.spinner("🔍 Searching PubMed database..."):
-        papers = fetch_research_papers(query=query, max_results=max_results)
+        try:
+            papers = fetch_research_papers(query=query, max_results=max_results)
+        except FetchFailed:
+            st.error("❌ PubMed could not be reached. Please try again later.")
+            return
     
     if not papers:
         st.warning("⚠️ No papers found. Try a different search term.")
@@ -51,17 +58,20 @@ def show():
         journal = paper.get("journal", "N/A")
         date = paper.get("date", "N/A")
         url = paper.get("url", "#")
+        # Abstracts are plain text (e.g. "p < 0.05"), the card is HTML
+        abstract = html.escape(truncate_text(paper.get("abstract", ""), 300))
         
         paper_card(
             title=title,
             authors=author_str if author_str else "Unknown authors",
             journal=journal,
             date=date,
-            url=url
+            url=url,
+            abstract=abstract
         )
     
     # Refresh button
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 Refresh Results", use_container_width=True):
-        st.cache_data.clear()
+        invalidate(fetch_research_papers, query=query, max_results=max_results)
         st.rerun()
@@ -0,0 +1,242 @@
+"""
+Approximate nearest-neighbour index types for the knowledge base
+
+FAISS.from_documents always builds an exact flat index, whose search time
+and memory grow linearly with the number of chunks. This module builds
+HNSW, IVF-Flat and IVF-PQ indexes instead (training the IVF ones on a
+sample) and picks one automatically from the corpus size.
+"""
+import math
+from typing import Callable, List, Optional, Tuple
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+import config
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+PQ_NBITS = 8  # bits per IVF-PQ code; each sub-quantizer trains 2**PQ_NBITS centroids
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Index type for a corpus of ``n_vectors`` chunks (honours a fixed ANN_INDEX_TYPE)"""
+    if config.ANN_INDEX_TYPE != "auto":
+        return config.ANN_INDEX_TYPE
+    for index_type, max_vectors in config.ANN_AUTO_THRESHOLDS:
+        if n_vectors < max_vectors:
+            return index_type
+    return "ivf_pq"
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Which of INDEX_TYPES a FAISS index is"""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def _nlist(n_vectors: int) -> int:
+    # ~4*sqrt(n) centroids, with enough training points per centroid
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // config.ANN_TRAIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """Largest number of sub-quantizers <= ANN_PQ_M that divides the dimension"""
+    m = min(config.ANN_PQ_M, dim)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def effective_index_type(index_type: str, n_vectors: int) -> str:
+    """
+    The type build_index() actually builds for ``n_vectors``: corpora too
+    small to train one get IVF-Flat (instead of IVF-PQ) or flat.
+    """
+    if index_type == "ivf_pq" and n_vectors < 2 ** PQ_NBITS:
+        # Fewer vectors than PQ centroids to train
+        index_type = "ivf_flat"
+    if index_type.startswith("ivf") and _nlist(n_vectors) < 2:
+        # Too few vectors to train an IVF index on
+        index_type = "flat"
+    return index_type
+
+
+def build_index(vectors: np.ndarray, index_type: str, seed: int = 0) -> faiss.Index:
+    """
+    Build and fill a FAISS index of ``index_type`` over ``vectors``
+    (float32, shape n x dim). IVF indexes are trained on a random sample;
+    small corpora get effective_index_type() instead.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+
+    index_type = effective_index_type(index_type, n)
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.ANN_HNSW_M)
+        index.hnsw.efConstruction = config.ANN_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = config.ANN_HNSW_EF_SEARCH
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _nlist(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), PQ_NBITS)
+        sample_size = min(n, nlist * config.ANN_TRAIN_POINTS_PER_CENTROID * 4)
+        sample = vectors[np.random.default_rng(seed).choice(n, sample_size, replace=False)]
+        index.train(sample)
+        index.nprobe = min(config.ANN_IVF_NPROBE, nlist)
+    else:
+        raise ValueError(f"Unknown index type: {index_type!r} (expected one of {INDEX_TYPES})")
+
+    if n:
+        index.add(vectors)
+    return index
+
+
+def search_index(
+    index: faiss.Index,
+    queries: np.ndarray,
+    k: int,
+    exact_vectors: Callable[[np.ndarray], np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    index.search(), with IVF-PQ results re-ranked by exact distance: its
+    compressed codes only rank candidates, so ANN_PQ_RERANK_FACTOR * k of
+    them are fetched and ``exact_vectors(positions)`` supplies their full
+    vectors. Returns (squared L2 distances, positions) like index.search().
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    if index_type_of(index) != "ivf_pq":
+        return index.search(queries, k)
+    _, candidates = index.search(queries, k * config.ANN_PQ_RERANK_FACTOR)
+    distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+    positions = np.full((len(queries), k), -1, dtype=np.int64)
+    for row, (query, found) in enumerate(zip(queries, candidates)):
+        found = found[found != -1]
+        if not len(found):
+            continue
+        exact = ((np.asarray(exact_vectors(found), dtype=np.float32) - query) ** 2).sum(axis=1)
+        best = np.argsort(exact)[:k]
+        distances[row, :len(best)] = exact[best]
+        positions[row, :len(best)] = found[best]
+    return distances, positions
+
+
+def index_vectors(index: faiss.Index) -> np.ndarray:
+    """
+    All vectors stored in an index, in insertion order. Exact for flat,
+    HNSW and IVF-Flat indexes; IVF-PQ returns its (lossy) reconstructions.
+    """
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+        try:
+            return index.reconstruct_n(0, index.ntotal)
+        finally:
+            index.make_direct_map(False)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def store_vectors(vector_store: FAISS) -> np.ndarray:
+    """
+    Exact vectors of a store, in index order. IVF-PQ only keeps compressed
+    codes, so its chunks are re-embedded instead (served from the
+    embedding cache rather than the model).
+    """
+    if index_type_of(vector_store.index) != "ivf_pq":
+        return index_vectors(vector_store.index)
+    texts = [
+        vector_store.docstore.search(vector_store.index_to_docstore_id[i]).page_content
+        for i in range(vector_store.index.ntotal)
+    ]
+    return np.asarray(vector_store.embedding_function.embed_documents(texts), dtype=np.float32)
+
+
+def _rebuilt(vector_store: FAISS, vectors: np.ndarray, ids: List[str], index_type: str) -> FAISS:
+    return FAISS(
+        embedding_function=vector_store.embedding_function,
+        index=build_index(vectors, index_type),
+        docstore=vector_store.docstore,
+        index_to_docstore_id=dict(enumerate(ids))
+    )
+
+
+def reindex(vector_store: FAISS, index_type: Optional[str] = None) -> FAISS:
+    """
+    Rebuild a LangChain FAISS store on another index type, keeping its
+    docstore and ids. Defaults to choose_index_type() for its size. Nothing
+    is rebuilt when build_index() would fall back to the current type.
+    """
+    n = vector_store.index.ntotal
+    index_type = effective_index_type(index_type or choose_index_type(n), n)
+    if index_type == index_type_of(vector_store.index):
+        return vector_store
+    ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+    return _rebuilt(vector_store, store_vectors(vector_store), ids, index_type)
+
+
+def append_store(target: FAISS, source: FAISS) -> FAISS:
+    """Add every chunk of ``source`` (a flat per-document store) to ``target``"""
+    if index_type_of(target.index) == "flat":
+        target.merge_from(source)
+        return target
+    ids = [source.index_to_docstore_id[i] for i in range(source.index.ntotal)]
+    documents = [source.docstore.search(doc_id) for doc_id in ids]
+    vectors = index_vectors(source.index)
+    target.add_embeddings(
+        list(zip([doc.page_content for doc in documents], vectors.tolist())),
+        metadatas=[doc.metadata for doc in documents],
+        ids=ids
+    )
+    return target
+
+
+def _compact_ivf_labels(index: faiss.Index, removed: np.ndarray):
+    """
+    Renumber an IVF index's labels after ``removed`` (sorted) were deleted,
+    so they are contiguous positions again like a flat index's. Only the
+    ids in the inverted lists are rewritten; the codes stay as they are.
+    """
+    ivf = faiss.extract_index_ivf(index)
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if not size:
+            continue
+        labels = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * invlists.code_size).copy()
+        labels -= np.searchsorted(removed, labels)
+        invlists.update_entries(list_no, 0, size, faiss.swig_ptr(labels), faiss.swig_ptr(codes))
+
+
+def remove_from_store(vector_store: FAISS, ids: List[str]) -> FAISS:
+    """
+    Delete chunks by docstore id. Flat and IVF indexes delete in place (IVF
+    labels are then renumbered to match the store's positions); HNSW cannot
+    remove vectors, so it is rebuilt from the remaining vectors.
+    """
+    index_type = index_type_of(vector_store.index)
+    if index_type in ("flat", "ivf_flat", "ivf_pq"):
+        removed = set(ids)
+        positions = np.array(
+            sorted(i for i, doc_id in vector_store.index_to_docstore_id.items() if doc_id in removed),
+            dtype=np.int64
+        )
+        vector_store.delete(ids)
+        if index_type != "flat":
+            _compact_ivf_labels(vector_store.index, positions)
+        return vector_store
+    removed = set(ids)
+    positions = [i for i in range(vector_store.index.ntotal) if vector_store.index_to_docstore_id[i] not in removed]
+    remaining_ids = [vector_store.index_to_docstore_id[i] for i in positions]
+    vectors = store_vectors(vector_store)[positions]
+    vector_store.docstore.delete(list(removed))
+    return _rebuilt(vector_store, vectors, remaining_ids, index_type)
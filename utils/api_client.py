@@ -2,21 +2,121 @@
 API Client with error handling and retry logic
 """
 import requests
+import threading
 import time
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 import streamlit as st
-from config import REQUEST_TIMEOUT, MAX_RETRIES
+from utils.rate_limiter import rate_limiter, parse_retry_after
+from config import (
+    REQUEST_TIMEOUT,
+    MAX_RETRIES,
+    RATE_LIMIT_DEFAULT_BACKOFF,
+    HTTP_POOL_MAXSIZE,
+    HTTP_POOL_BLOCK,
+    HTTP_DEFAULT_HEADERS
+)
+
+
+class SessionRegistry:
+    """
+    Process-wide registry of pooled keep-alive sessions, one per upstream host.
+
+    Sessions are created lazily on first use and shared by every thread
+    (and therefore every Streamlit user session) in the server process,
+    so repeated calls to the same API reuse open TCP/TLS connections.
+    """
+
+    def __init__(self, pool_maxsize: int = HTTP_POOL_MAXSIZE, pool_block: bool = HTTP_POOL_BLOCK):
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """Return the scheme://host[:port] part of a URL"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        # A single host per session, so one pool with pool_maxsize connections
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(HTTP_DEFAULT_HEADERS)
+        return session
+
+    def get(self, url: str) -> requests.Session:
+        """Get (or create) the pooled session for the host serving ``url``"""
+        key = self.host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session()
+                    self._sessions[key] = session
+        return session
+
+    def hosts(self) -> list:
+        """Hosts that currently have an open session"""
+        with self._lock:
+            return sorted(self._sessions)
+
+    def close(self):
+        """Close every pooled session and its connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Shared by all fetchers in utils.data_fetchers (via APIClient)
+session_registry = SessionRegistry()
 
 
 class APIClient:
     """Generic API client with retry and error handling"""
+
+    _local = threading.local()
+
+    @staticmethod
+    @contextmanager
+    def silenced():
+        """
+        Suppress the st.error/st.warning messages for requests made on this
+        thread. Used by worker threads, which have no page to render into;
+        failures are still reported to the caller as a None response.
+        """
+        previous = getattr(APIClient._local, "silenced", False)
+        APIClient._local.silenced = True
+        try:
+            yield
+        finally:
+            APIClient._local.silenced = previous
+
+    @staticmethod
+    def _notify(level: str, message: str):
+        """Show an error/warning message unless the thread is silenced"""
+        if getattr(APIClient._local, "silenced", False):
+            return
+        getattr(st, level)(message)
     
     @staticmethod
     def make_request(
         url: str,
         params: Optional[Dict[str, Any]] = None,
         headers: Optional[Dict[str, str]] = None,
-        method: str = "GET"
+        method: str = "GET",
+        timeout: Optional[float] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Make HTTP request with retry logic
@@ -26,55 +126,112 @@ class APIClient:
             params: Query parameters
             headers: Request headers
             method: HTTP method (GET, POST)
+            timeout: Per-attempt timeout in seconds (defaults to REQUEST_TIMEOUT)
             
         Returns:
             JSON response or None if failed
         """
+        response = APIClient._send(url, params, headers, method, timeout)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            APIClient._notify("error", f"❌ Unexpected error: {str(e)}")
+            return None
+
+    @staticmethod
+    @contextmanager
+    def stream(
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator[Optional[BinaryIO]]:
+        """
+        GET request whose body is read incrementally, e.g. by an XML
+        iterparse, instead of being loaded into memory first. Same retries
+        and rate limiting as make_request.
+        
+        Yields:
+            File-like object over the (decompressed) body, or None if failed
+        """
+        response = APIClient._send(url, params, headers, "GET", timeout, stream=True)
+        if response is None:
+            yield None
+            return
+        try:
+            response.raw.decode_content = True
+            yield response.raw
+        finally:
+            response.close()
+
+    @staticmethod
+    def _send(
+        url: str,
+        params: Optional[Dict[str, Any]],
+        headers: Optional[Dict[str, str]],
+        method: str,
+        timeout: Optional[float],
+        stream: bool = False
+    ) -> Optional[requests.Response]:
+        """Send a request with retries; the successful response, or None"""
+        session = session_registry.get(url)
+        timeout = timeout or REQUEST_TIMEOUT
+
         for attempt in range(MAX_RETRIES):
+            # Wait our turn for the host's rate limit (also honours Retry-After pauses)
+            if not rate_limiter.acquire(url):
+                APIClient._notify("warning", "⚠️ Rate limit reached. Please wait a moment.")
+                return None
+
             try:
                 if method == "GET":
-                    response = requests.get(
+                    response = session.get(
                         url,
                         params=params,
                         headers=headers,
-                        timeout=REQUEST_TIMEOUT
+                        timeout=timeout,
+                        stream=stream
                     )
                 else:
-                    response = requests.post(
+                    response = session.post(
                         url,
                         json=params,
                         headers=headers,
-                        timeout=REQUEST_TIMEOUT
+                        timeout=timeout
                     )
                 
                 response.raise_for_status()
-                return response.json()
+                return response
                 
             except requests.exceptions.Timeout:
                 if attempt < MAX_RETRIES - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
                     continue
-                st.error("⏱️ Request timed out. Please try again later.")
+                APIClient._notify("error", "⏱️ Request timed out. Please try again later.")
                 return None
                 
             except requests.exceptions.HTTPError as e:
+                response.close()  # releases the connection of a streamed response
                 if response.status_code == 429:  # Rate limit
-                    st.warning("⚠️ Rate limit reached. Please wait a moment.")
-                    time.sleep(5)
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    rate_limiter.block_for(url, retry_after if retry_after is not None else RATE_LIMIT_DEFAULT_BACKOFF)
                     if attempt < MAX_RETRIES - 1:
                         continue
+                    APIClient._notify("warning", "⚠️ Rate limit reached. Please wait a moment.")
                 elif response.status_code == 404:
-                    st.error("❌ Resource not found.")
+                    APIClient._notify("error", "❌ Resource not found.")
                 else:
-                    st.error(f"❌ HTTP Error: {e}")
+                    APIClient._notify("error", f"❌ HTTP Error: {e}")
                 return None
                 
             except requests.exceptions.ConnectionError:
-                st.error("🌐 Connection error. Please check your internet connection.")
+                APIClient._notify("error", "🌐 Connection error. Please check your internet connection.")
                 return None
                 
             except Exception as e:
-                st.error(f"❌ Unexpected error: {str(e)}")
+                APIClient._notify("error", f"❌ Unexpected error: {str(e)}")
                 return None
         
         return None
@@ -0,0 +1,116 @@
+"""
+In-memory BM25 inverted index for lexical retrieval
+
+Sentence embeddings blur exact tokens such as product codes, NDC numbers
+and strengths ("500 mg"), so the knowledge base keeps this index next to
+its FAISS index and fuses the two rankings.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+import config
+
+# Words, numbers and codes such as "0093-7146-56", "sku-4411" or "2.5"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+# "500mg" -> "500", "mg"
+_NUMBER_UNIT_RE = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+# Function words and question words: sharing one of these says nothing about relevance
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not of off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves tell please
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased tokens without stopwords. Compound codes are kept whole and
+    also split into their parts, so "NDC 0093-7146" matches both the full
+    code and "7146".
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token not in _STOPWORDS:
+            tokens.append(token)
+        parts = _NUMBER_UNIT_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in _STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over chunks keyed by id, with incremental add and remove"""
+
+    def __init__(self, k1: float = None, b: float = None):
+        self.k1 = config.BM25_K1 if k1 is None else k1
+        self.b = config.BM25_B if b is None else b
+        # term -> {chunk id -> term frequency}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        for chunk_id, text in zip(ids, texts):
+            if chunk_id in self.lengths:
+                continue
+            terms = Counter(tokenize(text))
+            for term, count in terms.items():
+                self.postings[term][chunk_id] = count
+            length = sum(terms.values())
+            self.lengths[chunk_id] = length
+            self.total_length += length
+
+    def remove(self, ids: Iterable[str]):
+        removed = {chunk_id for chunk_id in ids if chunk_id in self.lengths}
+        if not removed:
+            return
+        for term in list(self.postings):
+            postings = self.postings[term]
+            for chunk_id in removed.intersection(postings):
+                del postings[chunk_id]
+            if not postings:
+                del self.postings[term]
+        for chunk_id in removed:
+            self.total_length -= self.lengths.pop(chunk_id)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Top ``k`` (chunk id, score) pairs. Only query terms with an IDF of
+        at least BM25_MIN_IDF count, so chunks sharing nothing but common
+        words with the query are left out.
+        """
+        if not self.lengths:
+            return []
+        n = len(self.lengths)
+        average_length = self.total_length / n
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            if idf < config.BM25_MIN_IDF:
+                continue
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / average_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = None) -> List[str]:
+    """Merge ranked id lists by summing 1 / (k + rank) over the lists each id appears in"""
+    k = config.RRF_K if k is None else k
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] += 1 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,481 @@
+"""
+Persistent cache backends for the data fetchers
+
+st.cache_data only keeps results in the memory of one server process. The
+backends here sit underneath it so that restarts, deploys and additional
+Streamlit processes on the same box start warm. Values are stored as
+zlib-compressed JSON and keep the config.CACHE_TTL categories.
+
+Entries outlive their TTL: expired entries are served while they are
+refreshed in the background (stale-while-revalidate) and as a fallback
+when the upstream fails (stale-if-error).
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import namedtuple
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Optional
+import streamlit as st
+from utils.api_client import APIClient
+from utils.refresh import scheduler
+from utils.singleflight import SingleFlight
+import config
+
+
+# value: the cached payload, stored_at: unix time it was written,
+# invalidated: a refresh was requested, so the entry is only kept as a fallback
+CacheEntry = namedtuple("CacheEntry", ["value", "stored_at", "source", "category", "invalidated"])
+
+
+class FetchFailed(RuntimeError):
+    """A cached fetcher's upstream failed and there was no stale entry to serve instead"""
+
+
+def encode_payload(value: Any) -> bytes:
+    """Serialize and compress a payload"""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def decode_payload(blob: bytes) -> Any:
+    """Inverse of encode_payload"""
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class CacheBackend:
+    """Interface implemented by every cache backend"""
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, source: str, category: str, ttl: float):
+        """Store ``value``; ``ttl`` is how long the entry is retained, stale or not"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def invalidate(self, key: Optional[str] = None, source: Optional[str] = None):
+        """
+        Mark one key, or every key of a source, as needing a refetch. The
+        payload is kept so it can still be served if the refetch fails.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def size(self) -> Dict[str, Any]:
+        """Number of entries and stored bytes, overall and per category"""
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process backend (same lifetime as st.cache_data, mainly for development)"""
+
+    name = "memory"
+
+    def __init__(self):
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+        if item is None:
+            return None
+        blob, stored_at, source, category, expires_at, invalidated = item
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return CacheEntry(decode_payload(blob), stored_at, source, category, invalidated)
+
+    def set(self, key: str, value: Any, source: str, category: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (encode_payload(value), now, source, category, now + ttl, False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate(self, key: Optional[str] = None, source: Optional[str] = None):
+        with self._lock:
+            for entry_key, item in self._entries.items():
+                if entry_key == key or (source is not None and item[2] == source):
+                    self._entries[entry_key] = item[:5] + (True,)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> Dict[str, Any]:
+        by_category: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            items = list(self._entries.values())
+        for blob, _, _, category, _, _ in items:
+            stats = by_category.setdefault(category, {"entries": 0, "bytes": 0})
+            stats["entries"] += 1
+            stats["bytes"] += len(blob)
+        return {
+            "entries": sum(s["entries"] for s in by_category.values()),
+            "bytes": sum(s["bytes"] for s in by_category.values()),
+            "by_category": by_category
+        }
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk backend shared by every process on the host.
+
+    Uses WAL journaling so readers in one Streamlit process never block on a
+    writer in another. Each thread gets its own connection.
+    """
+
+    name = "sqlite"
+    PURGE_EVERY = 200  # writes between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                category TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                invalidated INTEGER NOT NULL DEFAULT 0,
+                payload BLOB NOT NULL
+            )
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+        if "invalidated" not in columns:
+            # Cache files created before scoped invalidation existed
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN invalidated INTEGER NOT NULL DEFAULT 0")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_source ON cache_entries(source)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        row = self._connect().execute(
+            "SELECT payload, stored_at, source, category, invalidated FROM cache_entries "
+            "WHERE key = ? AND expires_at >= ?",
+            (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(decode_payload(row[0]), row[1], row[2], row[3], bool(row[4]))
+
+    def set(self, key: str, value: Any, source: str, category: str, ttl: float):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, source, category, stored_at, expires_at, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, source, category, now, now + ttl, encode_payload(value))
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def invalidate(self, key: Optional[str] = None, source: Optional[str] = None):
+        if key is not None:
+            self._connect().execute("UPDATE cache_entries SET invalidated = 1 WHERE key = ?", (key,))
+        if source is not None:
+            self._connect().execute("UPDATE cache_entries SET invalidated = 1 WHERE source = ?", (source,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM cache_entries")
+
+    def size(self) -> Dict[str, Any]:
+        rows = self._connect().execute(
+            "SELECT category, COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM cache_entries GROUP BY category"
+        ).fetchall()
+        by_category = {category: {"entries": count, "bytes": size} for category, count, size in rows}
+        return {
+            "entries": sum(s["entries"] for s in by_category.values()),
+            "bytes": sum(s["bytes"] for s in by_category.values()),
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            "by_category": by_category
+        }
+
+
+BACKENDS: Dict[str, Callable[[], CacheBackend]] = {
+    "sqlite": lambda: SQLiteCacheBackend(config.CACHE_DB_PATH),
+    "memory": MemoryCacheBackend,
+}
+
+
+def register_backend(name: str, factory: Callable[[], CacheBackend]):
+    """Make a custom backend selectable through the CACHE_BACKEND setting"""
+    BACKENDS[name] = factory
+
+
+class CacheStats:
+    """Hit/miss counters for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[str, int]] = {}
+
+    def record(self, category: str, outcome: str):
+        with self._lock:
+            counts = self.counters.setdefault(category, {"hits": 0, "stale_hits": 0, "stale_if_error": 0, "misses": 0})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {category: dict(counts) for category, counts in self.counters.items()}
+
+
+stats = CacheStats()
+# Coalesces concurrent fetches of the same normalized key within this process
+flights = SingleFlight()
+_backend: Optional[CacheBackend] = None
+_backend_failed = False
+_backend_lock = threading.Lock()
+# Backend failures (unwritable CACHE_DIR, locked or full database) that degrade to uncached fetches
+BACKEND_ERRORS = (sqlite3.Error, OSError)
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+    """Return the configured backend, or None when CACHE_BACKEND is 'none' or it cannot be opened"""
+    global _backend, _backend_failed
+    if config.CACHE_BACKEND == "none" or _backend_failed:
+        return None
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None and not _backend_failed:
+                try:
+                    _backend = BACKENDS[config.CACHE_BACKEND]()
+                except BACKEND_ERRORS:
+                    _backend_failed = True
+    return _backend
+
+
+# Boolean operators of the NewsAPI, PubMed and ClinicalTrials.gov searches (uppercase only)
+_SEARCH_OPERATORS = {"AND", "OR", "NOT"}
+
+
+def normalize_argument(value: Any) -> Any:
+    """
+    Normalize a fetcher argument for keying. Search terms are
+    case-insensitive upstream, so "Aspirin " and "aspirin" share one cache
+    entry and one in-flight request. Only uppercase AND/OR/NOT are
+    operators there, so those keep their case: "cancer AND aspirin" and
+    "cancer and aspirin" are different searches.
+    """
+    if isinstance(value, str):
+        return " ".join(
+            word if word in _SEARCH_OPERATORS else word.casefold() for word in value.split()
+        )
+    return value
+
+
+def make_cache_key(source: str, signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """Key a call by its source and normalized bound arguments (defaults applied)"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = json.dumps(
+        {name: normalize_argument(value) for name, value in bound.arguments.items()},
+        sort_keys=True,
+        default=str
+    )
+    return f"{source}:{hashlib.sha1(arguments.encode('utf-8')).hexdigest()}"
+
+
+def persistent_cache(category: str):
+    """
+    Cache a fetcher's results in the persistent backend.
+
+    Meant to sit underneath @st.cache_data (see cached_fetcher). Within the
+    category TTL entries are returned as-is. After it, the stale entry is
+    returned immediately and refreshed by the background scheduler; past
+    CACHE_STALE_WHILE_REVALIDATE, or once the entry has been invalidated,
+    the call refetches synchronously and falls back to the stale entry if
+    the upstream raises or comes back empty. Empty or None results are
+    never persisted. If the backend itself fails, calls fetch uncached.
+
+    A fetcher signals an upstream failure by returning None. Without a
+    stale entry to fall back on, the call raises FetchFailed instead, so
+    st.cache_data above does not keep the failure for the whole TTL.
+
+    Args:
+        category: Key into config.CACHE_TTL
+    """
+    ttl = config.CACHE_TTL[category]
+    retention = ttl + max(config.CACHE_STALE_WHILE_REVALIDATE, config.CACHE_STALE_IF_ERROR)
+
+    def decorator(func):
+        source = func.__name__
+        signature = inspect.signature(func)
+
+        def fetch(args: tuple, kwargs: dict) -> Any:
+            value = func(*args, **kwargs)
+            if value is None:
+                raise FetchFailed(f"{source} failed and no cached copy is available")
+            return value
+
+        def fetch_and_store(backend: CacheBackend, key: str, args: tuple, kwargs: dict) -> Any:
+            value = func(*args, **kwargs)
+            if value:
+                try:
+                    backend.set(key, value, source=source, category=category, ttl=retention)
+                except BACKEND_ERRORS:
+                    pass  # still return what was fetched
+            return value
+
+        def refresh(backend: CacheBackend, key: str, args: tuple, kwargs: dict) -> bool:
+            if not flights.do(key, lambda: fetch_and_store(backend, key, args, kwargs)):
+                return False
+            if wrapper.memory_cache is not None:
+                # Drop the stale copy st.cache_data took, so the next rerun sees the new value
+                wrapper.memory_cache.clear(*args, **kwargs)
+            return True
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_cache_key(source, signature, args, kwargs)
+            backend = get_cache_backend()
+            if backend is None:
+                return flights.do(key, lambda: fetch(args, kwargs))
+
+            try:
+                entry = backend.get(key)
+            except BACKEND_ERRORS:
+                return flights.do(key, lambda: fetch(args, kwargs))
+            if entry is not None:
+                age = time.time() - entry.stored_at
+                if age < ttl and not entry.invalidated:
+                    stats.record(category, "hits")
+                    return entry.value
+                if age < ttl + config.CACHE_STALE_WHILE_REVALIDATE and not entry.invalidated:
+                    stats.record(category, "stale_hits")
+                    scheduler.schedule(key, lambda: refresh(backend, key, args, kwargs))
+                    return entry.value
+
+            stats.record(category, "misses")
+            # With a fallback in hand, upstream errors are not worth showing to the user
+            with APIClient.silenced() if entry is not None else nullcontext():
+                try:
+                    # Concurrent callers for this key wait for the first one's result
+                    value = flights.do(key, lambda: fetch_and_store(backend, key, args, kwargs))
+                except Exception:
+                    if entry is None or age >= ttl + config.CACHE_STALE_IF_ERROR:
+                        raise
+                    value = None
+            if value:
+                return value
+            if entry is not None and age < ttl + config.CACHE_STALE_IF_ERROR:
+                stats.record(category, "stale_if_error")
+                return entry.value
+            if value is None:
+                raise FetchFailed(f"{source} failed and no cached copy is available")
+            return value
+
+        wrapper.memory_cache = None
+        wrapper.source = source
+        wrapper.cache_key = lambda *args, **kwargs: make_cache_key(source, signature, args, kwargs)
+        return wrapper
+
+    return decorator
+
+
+# source name -> persistent wrapper, for every @cached_fetcher function
+_FETCHERS: Dict[str, Callable] = {}
+
+
+def cached_fetcher(category: str):
+    """
+    Two-level cache for a fetcher: st.cache_data in memory, backed by the
+    persistent backend. Both levels use config.CACHE_TTL[category].
+    """
+    def decorator(func):
+        persisted = persistent_cache(category)(func)
+        cached = st.cache_data(ttl=config.CACHE_TTL[category])(persisted)
+        persisted.memory_cache = cached
+        _FETCHERS[persisted.source] = persisted
+        return cached
+
+    return decorator
+
+
+def _persisted(fetcher: Callable) -> Callable:
+    """Resolve a @cached_fetcher function (or its name) to its persistent wrapper"""
+    source = fetcher if isinstance(fetcher, str) else getattr(fetcher, "__name__", "")
+    if source not in _FETCHERS:
+        raise ValueError(f"{source!r} is not a @cached_fetcher function")
+    return _FETCHERS[source]
+
+
+def invalidate(fetcher: Callable, *args, **kwargs):
+    """
+    Refresh a single cached call, e.g. one search query.
+
+    Pass the arguments exactly as the page passes them to the fetcher, so
+    the st.cache_data entry for that call is the one that gets dropped.
+    Other queries, other fetchers and other users' entries are untouched.
+    """
+    persisted = _persisted(fetcher)
+    backend = get_cache_backend()
+    if backend is not None:
+        try:
+            backend.invalidate(key=persisted.cache_key(*args, **kwargs))
+        except BACKEND_ERRORS:
+            pass
+    persisted.memory_cache.clear(*args, **kwargs)
+
+
+def invalidate_source(fetcher: Callable):
+    """Refresh every cached call of one fetcher, e.g. the whole regulatory feed"""
+    persisted = _persisted(fetcher)
+    backend = get_cache_backend()
+    if backend is not None:
+        try:
+            backend.invalidate(source=persisted.source)
+        except BACKEND_ERRORS:
+            pass
+    persisted.memory_cache.clear()
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit, miss and size statistics for the persistent cache"""
+    backend = get_cache_backend()
+    counters = stats.snapshot()
+    hits = sum(c.get("hits", 0) + c.get("stale_hits", 0) + c.get("stale_if_error", 0) for c in counters.values())
+    misses = sum(c.get("misses", 0) for c in counters.values())
+    return {
+        "backend": backend.name if backend else "none",
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "by_category": counters,
+        "refreshes_pending": scheduler.pending(),
+        "size": backend.size() if backend else {}
+    }
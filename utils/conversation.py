@@ -0,0 +1,116 @@
+"""
+Token-budgeted chat context with a rolling summary
+
+Instead of resending the last N messages verbatim, the prompt holds the
+newest turns that fit CHAT_HISTORY_TOKEN_BUDGET plus a short summary of
+everything older. The summary is brought up to date on a worker thread
+after each reply, so the prompt size stays bounded however long the
+conversation gets and nobody waits for summarization.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import config
+
+# summarize(previous_summary, messages) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+_executor = ThreadPoolExecutor(max_workers=config.CHAT_SUMMARY_WORKERS, thread_name_prefix="chat-summary")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate token count (~4 characters per token for English with the
+    Llama 3 tokenizer); only used for budgeting, so no tokenizer is loaded.
+    """
+    return max(1, (len(text) + 3) // 4)
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    # Role and chat-template framing add a few tokens per message
+    return count_tokens(message["content"]) + 4
+
+
+class ConversationContext:
+    """
+    Prompt builder for one chat session. Messages before ``summarized_upto``
+    are represented only by ``summary``.
+    """
+
+    def __init__(self, budget: int = None):
+        self.budget = config.CHAT_HISTORY_TOKEN_BUDGET if budget is None else budget
+        self.summary = ""
+        self.summarized_upto = 0
+        self._lock = threading.Lock()
+        self._summarizing = False
+
+    def build_messages(self, system_prompt: str, history: List[Dict[str, str]], question: str) -> List[Dict[str, str]]:
+        """
+        System prompt, the running summary, the newest unsummarized turns
+        that fit the budget, then the question. ``history`` may already end
+        with the question.
+        """
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == question:
+            history = history[:-1]
+        with self._lock:
+            summary, start = self.summary, min(self.summarized_upto, len(history))
+
+        recent: List[Dict[str, str]] = []
+        used = 0
+        for message in reversed(history[start:]):
+            used += message_tokens(message)
+            if used > self.budget:
+                break
+            recent.append({"role": message["role"], "content": message["content"]})
+        recent.reverse()
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        messages.extend(recent)
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def _fold_point(self, history: List[Dict[str, str]]) -> int:
+        """
+        Index up to which history should be summarized: once the unsummarized
+        turns exceed the budget, everything but the newest half-budget goes.
+        """
+        unsummarized = history[self.summarized_upto:]
+        if sum(message_tokens(m) for m in unsummarized) <= self.budget:
+            return self.summarized_upto
+        kept = 0
+        split = len(history)
+        while split > self.summarized_upto and kept + message_tokens(history[split - 1]) <= self.budget // 2:
+            split -= 1
+            kept += message_tokens(history[split])
+        return split
+
+    def schedule_summary(self, history: List[Dict[str, str]], summarize: Summarizer) -> bool:
+        """
+        Fold turns that no longer fit into the summary, on a worker thread.
+
+        Returns:
+            True if a summarization was started
+        """
+        with self._lock:
+            if self._summarizing:
+                return False
+            fold_to = self._fold_point(history)
+            if fold_to <= self.summarized_upto:
+                return False
+            self._summarizing = True
+            previous, folded = self.summary, list(history[self.summarized_upto:fold_to])
+        _executor.submit(self._summarize, previous, folded, fold_to, summarize)
+        return True
+
+    def _summarize(self, previous: str, folded: List[Dict[str, str]], fold_to: int, summarize: Summarizer):
+        try:
+            summary: Optional[str] = summarize(previous, folded)
+        except Exception:
+            summary = None
+        with self._lock:
+            self._summarizing = False
+            if summary:
+                self.summary = summary
+                self.summarized_upto = fold_to
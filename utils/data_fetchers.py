@@ -1,16 +1,21 @@
 """
 Data fetchers for various pharma APIs
 """
-import streamlit as st
-from typing import List, Dict, Any, Optional
+import time
+import xml.etree.ElementTree as ET
+import requests
+import urllib3
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Tuple
 from datetime import datetime, timedelta
 from utils.api_client import APIClient
+from utils.cache import cached_fetcher
+from utils import news_store
 import config
 
 
-@st.cache_data(ttl=config.CACHE_TTL["news"])
-def fetch_pharma_news(query: str = "pharmaceutical", page_size: int = 10) -> List[Dict[str, Any]]:
-    """Fetch pharma news from NewsAPI"""
+def search_newsapi(query: str, page_size: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """One NewsAPI search over the last 30 days, uncached; None when the request fails"""
     params = {
         "q": query,
         "language": "en",
@@ -27,13 +32,39 @@ def fetch_pharma_news(query: str = "pharmaceutical", page_size: int = 10) -> Lis
     
     if response and response.get("status") == "ok":
         return response.get("articles", [])
+    return None
+
+
+@cached_fetcher("news")
+def fetch_pharma_news(query: str = "pharmaceutical", page_size: int = 10) -> List[Dict[str, Any]]:
+    """Fetch pharma news from NewsAPI"""
+    return search_newsapi(query, page_size)
+
+
+def search_pharma_news(query: str, page_size: int = 10, local_query: Optional[str] = None, refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    News for a search: answered from the local news store when it can be,
+    otherwise from NewsAPI (and the results are added to the store).
+
+    Args:
+        query: NewsAPI query
+        local_query: Query for the local store, if it differs from ``query``
+        refresh: Skip the local store and fetch from NewsAPI
+    """
+    if not refresh:
+        articles = news_store.search_local(local_query or query, page_size)
+        if articles is not None:
+            return articles
+    articles = fetch_pharma_news(query=query, page_size=page_size)
+    news_store.remember(articles)
+    return articles
 
-@st.cache_data(ttl=config.CACHE_TTL["news"])
 def fetch_pharma_news_multi_query(base_query: str, page_size: int = 50) -> List[Dict[str, Any]]:
     """
     Enhanced news fetcher. 
     Instead of making multiple API calls (which hits rate limits), 
     we fetch a larger batch with a broad query and filter locally.
+    Caching (and invalidation) happens in fetch_pharma_news.
     """
     try:
         # Fetch a single large batch
@@ -43,44 +74,106 @@ def fetch_pharma_news_multi_query(base_query: str, page_size: int = 50) -> List[
 
 
 
-@st.cache_data(ttl=config.CACHE_TTL["research"])
-def fetch_research_papers(query: str = "pharmaceutical", max_results: int = 10) -> List[Dict[str, Any]]:
-    """Fetch research papers from PubMed"""
-    # Step 1: Search for IDs
+def _pubmed_search(query: str) -> Optional[Tuple[int, str, str]]:
+    """Run an esearch on the history server: (hit count, WebEnv, query_key), or None"""
     search_params = {
         "db": "pubmed",
         "term": query,
-        "retmax": max_results,
+        "retmax": 0,  # IDs stay on the history server
         "retmode": "json",
-        "sort": "relevance"
+        "sort": "relevance",
+        "usehistory": "y"
     }
-    
     search_response = APIClient.make_request(config.PUBMED_SEARCH, params=search_params)
-    
     if not search_response or "esearchresult" not in search_response:
-        return []
-    
-    id_list = search_response["esearchresult"].get("idlist", [])
-    
-    if not id_list:
-        return []
-    
-    # Step 2: Get summaries
+        return None
+    result = search_response["esearchresult"]
+    if "webenv" not in result or "querykey" not in result:
+        return None
+    return int(result.get("count", 0)), result["webenv"], result["querykey"]
+
+
+def _xml_text(elem: Optional[ET.Element]) -> str:
+    """All text of an element, including inline markup such as <i>"""
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def _parse_pubmed_article(article: ET.Element) -> Dict[str, Any]:
+    """A <PubmedArticle> from efetch, in the shape of an esummary record plus the abstract"""
+    citation = article.find("MedlineCitation")
+    paper_id = _xml_text(citation.find("PMID"))
+    details = citation.find("Article")
+
+    authors = []
+    for author in details.iterfind("AuthorList/Author"):
+        name = _xml_text(author.find("CollectiveName")) or " ".join(
+            part for part in (_xml_text(author.find("LastName")), _xml_text(author.find("Initials"))) if part
+        )
+        if name:
+            authors.append(name)
+
+    # Structured abstracts have one labelled section per AbstractText
+    sections = []
+    for section in details.iterfind("Abstract/AbstractText"):
+        text = _xml_text(section)
+        label = section.get("Label")
+        sections.append(f"{label}: {text}" if label and text else text)
+
+    pub_date = details.find("Journal/JournalIssue/PubDate")
+    date = ""
+    if pub_date is not None:
+        date = _xml_text(pub_date.find("MedlineDate")) or " ".join(
+            _xml_text(pub_date.find(part)) for part in ("Year", "Month", "Day") if pub_date.find(part) is not None
+        )
+
+    doi = _xml_text(details.find("ELocationID[@EIdType='doi']")) or _xml_text(
+        article.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+    )
+
+    return {
+        "id": paper_id,
+        "title": _xml_text(details.find("ArticleTitle")) or "N/A",
+        "authors": authors,
+        "journal": _xml_text(details.find("Journal/Title")) or "N/A",
+        "date": date or "N/A",
+        "doi": f"doi: {doi}" if doi else "",
+        "abstract": "\n".join(section for section in sections if section),
+        "url": f"https://pubmed.ncbi.nlm.nih.gov/{paper_id}/"
+    }
+
+
+def _iter_pubmed_xml(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """Parse efetch XML incrementally, one article at a time"""
+    root = None
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        if root is None:
+            root = elem
+        if event == "end" and elem.tag == "PubmedArticle":
+            yield _parse_pubmed_article(elem)
+            # Parsed articles are dropped, so memory stays at about one article
+            root.clear()
+        elif event == "end" and elem.tag == "PubmedBookArticle":
+            root.clear()
+
+
+def _pubmed_summaries(webenv: str, query_key: str, retstart: int, retmax: int) -> Optional[List[Dict[str, Any]]]:
+    """One esummary page of a history-server result set"""
     summary_params = {
         "db": "pubmed",
-        "id": ",".join(id_list),
+        "WebEnv": webenv,
+        "query_key": query_key,
+        "retstart": retstart,
+        "retmax": retmax,
         "retmode": "json"
     }
-    
     summary_response = APIClient.make_request(config.PUBMED_SUMMARY, params=summary_params)
-    
     if not summary_response or "result" not in summary_response:
-        return []
-    
+        return None
+
     papers = []
-    for paper_id in id_list:
-        if paper_id in summary_response["result"]:
-            paper_data = summary_response["result"][paper_id]
+    for paper_id in summary_response["result"].get("uids", []):
+        paper_data = summary_response["result"].get(paper_id)
+        if paper_data:
             papers.append({
                 "id": paper_id,
                 "title": paper_data.get("title", "N/A"),
@@ -90,11 +183,77 @@ def fetch_research_papers(query: str = "pharmaceutical", max_results: int = 10)
                 "doi": paper_data.get("elocationid", ""),
                 "url": f"https://pubmed.ncbi.nlm.nih.gov/{paper_id}/"
             })
-    
     return papers
 
 
-@st.cache_data(ttl=config.CACHE_TTL["drug_info"])
+def fetch_research_papers_iter(
+    query: str = "pharmaceutical",
+    max_results: Optional[int] = None,
+    batch_size: int = config.PUBMED_BATCH_SIZE,
+    abstracts: bool = True
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream research papers from PubMed, most relevant first.
+
+    The search result stays on the E-utilities history server (WebEnv and
+    query_key) and is read back in pages of ``batch_size``: efetch XML
+    parsed incrementally when ``abstracts`` is set, otherwise esummary.
+    Only one page is in flight at a time, and stopping early (or
+    ``max_results``) skips the remaining pages.
+
+    Raises:
+        RuntimeError: A page failed (request error, or a body cut off
+            while streaming), after the papers of earlier pages were yielded
+    """
+    search = _pubmed_search(query)
+    if search is None:
+        return
+    count, webenv, query_key = search
+    total = count if max_results is None else min(count, max_results)
+
+    for retstart in range(0, total, batch_size):
+        retmax = min(batch_size, total - retstart)
+        if not abstracts:
+            papers = _pubmed_summaries(webenv, query_key, retstart, retmax)
+            if papers is None:
+                raise RuntimeError(f"PubMed esummary failed at record {retstart}")
+            yield from papers
+            continue
+
+        fetch_params = {
+            "db": "pubmed",
+            "WebEnv": webenv,
+            "query_key": query_key,
+            "retstart": retstart,
+            "retmax": retmax,
+            "rettype": "abstract",
+            "retmode": "xml"
+        }
+        with APIClient.stream(config.PUBMED_FETCH, params=fetch_params) as body:
+            if body is None:
+                raise RuntimeError(f"PubMed efetch failed at record {retstart}")
+            try:
+                yield from _iter_pubmed_xml(body)
+            except (ET.ParseError, OSError, requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+                # Read timeouts and dropped connections surface here, while the body is parsed
+                raise RuntimeError(f"PubMed efetch failed at record {retstart}: {e}") from e
+
+
+@cached_fetcher("research")
+def fetch_research_papers(query: str = "pharmaceutical", max_results: int = 10) -> List[Dict[str, Any]]:
+    """
+    Fetch research papers (with abstracts) from PubMed.
+
+    None if any page fails: a partial list would be persisted as if it
+    were the whole result.
+    """
+    try:
+        return list(fetch_research_papers_iter(query, max_results=max_results))
+    except RuntimeError:
+        return None
+
+
+@cached_fetcher("drug_info")
 def fetch_drug_info(drug_name: str) -> List[Dict[str, Any]]:
     """Fetch drug information from OpenFDA"""
     endpoint = f"{config.OPENFDA_BASE}/label.json"
@@ -126,40 +285,79 @@ def fetch_drug_info(drug_name: str) -> List[Dict[str, Any]]:
     return []
 
 
-@st.cache_data(ttl=config.CACHE_TTL["clinical_trials"])
-def fetch_clinical_trials(query: str = "diabetes", page_size: int = 10) -> List[Dict[str, Any]]:
-    """Fetch clinical trials from ClinicalTrials.gov API v2"""
+def _trial_record(study: Dict[str, Any]) -> Dict[str, Any]:
+    protocol = study.get("protocolSection", {})
+    identification = protocol.get("identificationModule", {})
+    status = protocol.get("statusModule", {})
+    design = protocol.get("designModule", {})
+    
+    return {
+        "nct_id": identification.get("nctId", "N/A"),
+        "title": identification.get("briefTitle", "N/A"),
+        "status": status.get("overallStatus", "N/A"),
+        "phase": design.get("phases", ["N/A"])[0] if design.get("phases") else "N/A",
+        "enrollment": design.get("enrollmentInfo", {}).get("count", "N/A"),
+        "url": f"https://clinicaltrials.gov/study/{identification.get('nctId', '')}"
+    }
+
+
+def fetch_clinical_trials_iter(
+    query: str = "diabetes",
+    max_results: Optional[int] = None,
+    page_size: int = config.CLINICALTRIALS_MAX_PAGE_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream clinical trials from ClinicalTrials.gov API v2.
+
+    Only CLINICALTRIALS_FIELDS are requested (``fields=`` projection), and
+    pages are followed through ``nextPageToken`` until ``max_results``
+    trials were yielded, the results run out or the caller stops. The last
+    page is shrunk to what is still needed.
+
+    Raises:
+        RuntimeError: A page request failed, after the trials of earlier
+            pages were yielded
+    """
     params = {
         "query.term": query,
-        "pageSize": page_size,
+        "fields": ",".join(config.CLINICALTRIALS_FIELDS),
         "format": "json"
     }
-    
-    response = APIClient.make_request(config.CLINICALTRIALS_ENDPOINT, params=params)
-    
-    if response and "studies" in response:
-        trials = []
-        for study in response["studies"]:
-            protocol = study.get("protocolSection", {})
-            identification = protocol.get("identificationModule", {})
-            status = protocol.get("statusModule", {})
-            design = protocol.get("designModule", {})
-            
-            trials.append({
-                "nct_id": identification.get("nctId", "N/A"),
-                "title": identification.get("briefTitle", "N/A"),
-                "status": status.get("overallStatus", "N/A"),
-                "phase": design.get("phases", ["N/A"])[0] if design.get("phases") else "N/A",
-                "enrollment": status.get("enrollmentInfo", {}).get("count", "N/A"),
-                "url": f"https://clinicaltrials.gov/study/{identification.get('nctId', '')}"
-            })
-        return trials
-    return []
+    remaining = max_results
+    page_token = None
+    while remaining is None or remaining > 0:
+        page_params = dict(params, pageSize=page_size if remaining is None else min(page_size, remaining))
+        if page_token:
+            page_params["pageToken"] = page_token
+        response = APIClient.make_request(config.CLINICALTRIALS_ENDPOINT, params=page_params)
+        if not response:
+            raise RuntimeError(f"ClinicalTrials.gov page {page_token or 'first'} failed")
+        studies = response.get("studies", [])
+        for study in studies:
+            yield _trial_record(study)
+        if remaining is not None:
+            remaining -= len(studies)
+        page_token = response.get("nextPageToken")
+        if not page_token or not studies:
+            return
 
 
-@st.cache_data(ttl=config.CACHE_TTL["news"])
+@cached_fetcher("clinical_trials")
+def fetch_clinical_trials(query: str = "diabetes", page_size: int = 10) -> List[Dict[str, Any]]:
+    """
+    Fetch clinical trials from ClinicalTrials.gov API v2.
+
+    None if any page fails, so a partial list is not persisted as the result.
+    """
+    try:
+        return list(fetch_clinical_trials_iter(query, max_results=page_size))
+    except RuntimeError:
+        return None
+
+
+@cached_fetcher("news")
 def fetch_regulatory_updates(limit: int = 10) -> List[Dict[str, Any]]:
-    """Fetch FDA enforcement/recall data"""
+    """Fetch FDA enforcement/recall data; None if the request fails"""
     endpoint = f"{config.OPENFDA_BASE}/enforcement.json"
     
     params = {
@@ -171,8 +369,10 @@ def fetch_regulatory_updates(limit: int = 10) -> List[Dict[str, Any]]:
         params["api_key"] = config.OPENFDA_KEY
     
     response = APIClient.make_request(endpoint, params=params)
+    if response is None:
+        return None
     
-    if response and "results" in response:
+    if "results" in response:
         updates = []
         for result in response["results"]:
             updates.append({
@@ -187,47 +387,119 @@ def fetch_regulatory_updates(limit: int = 10) -> List[Dict[str, Any]]:
     return []
 
 
-@st.cache_data(ttl=config.CACHE_TTL["news"])
-def fetch_company_news(company: str, page_size: int = 5) -> List[Dict[str, Any]]:
-    """Fetch news for specific pharma company"""
-    return fetch_pharma_news(query=f"{company} pharma pharmaceutical", page_size=page_size)
+def company_news_query(company: str) -> str:
+    """NewsAPI query used for a company's news feed"""
+    return f"{company} pharma pharmaceutical"
 
 
-@st.cache_data(ttl=config.CACHE_TTL["analytics"])
-def fetch_analytics_data() -> Dict[str, Any]:
-    """Fetch data for analytics dashboard"""
-    # Get counts from various APIs
-    
-    # Total drugs from FDA
+def fetch_company_news(company: str, page_size: int = 5, refresh: bool = False) -> List[Dict[str, Any]]:
+    """Fetch news for specific pharma company (local news store first, then fetch_pharma_news)"""
+    return search_pharma_news(
+        company_news_query(company), page_size=page_size, local_query=f'"{company}"', refresh=refresh
+    )
+
+
+def _count_fda_drugs(timeout: float) -> Optional[int]:
+    """Total drugs from FDA"""
     drug_count_params = {"limit": 1}
     if config.OPENFDA_KEY:
         drug_count_params["api_key"] = config.OPENFDA_KEY
     drug_response = APIClient.make_request(
         f"{config.OPENFDA_BASE}/drugsfda.json",
-        params=drug_count_params
+        params=drug_count_params,
+        timeout=timeout
     )
-    total_drugs = drug_response.get("meta", {}).get("results", {}).get("total", 0) if drug_response else 0
-    
-    # Active trials
+    if drug_response is None:
+        return None
+    return drug_response.get("meta", {}).get("results", {}).get("total", 0)
+
+
+def _count_active_trials(timeout: float) -> Optional[int]:
+    """Active (recruiting) trials"""
+    # totalCount is only computed with countTotal; one NCT ID is the smallest page
     trials_response = APIClient.make_request(
         config.CLINICALTRIALS_ENDPOINT,
-        params={"query.term": "recruiting", "pageSize": 1, "format": "json"}
+        params={
+            "filter.overallStatus": "RECRUITING",
+            "countTotal": "true",
+            "fields": "NCTId",
+            "pageSize": 1,
+            "format": "json"
+        },
+        timeout=timeout
     )
-    active_trials = trials_response.get("totalCount", 0) if trials_response else 0
-    
-    # Recent papers (this month)
+    if trials_response is None:
+        return None
+    return trials_response.get("totalCount", 0)
+
+
+def _count_recent_papers(timeout: float) -> Optional[int]:
+    """Recent papers (this month)"""
     date_filter = datetime.now().strftime("%Y/%m/01")
     papers_params = {
         "db": "pubmed",
         "term": f"pharmaceutical AND {date_filter}[PDAT]",
         "retmode": "json"
     }
-    papers_response = APIClient.make_request(config.PUBMED_SEARCH, params=papers_params)
-    recent_papers = int(papers_response.get("esearchresult", {}).get("count", 0)) if papers_response else 0
-    
-    return {
-        "total_drugs": total_drugs,
-        "active_trials": active_trials,
-        "recent_papers": recent_papers,
-        "news_count": len(fetch_pharma_news(page_size=100))  # Cached
-    }
+    papers_response = APIClient.make_request(config.PUBMED_SEARCH, params=papers_params, timeout=timeout)
+    if papers_response is None:
+        return None
+    return int(papers_response.get("esearchresult", {}).get("count", 0))
+
+
+def _count_news(timeout: float) -> Optional[int]:
+    """News articles (shares the cached fetch_pharma_news result)"""
+    articles = fetch_pharma_news(page_size=100)
+    return len(articles) if articles is not None else None
+
+
+ANALYTICS_SOURCES = {
+    "total_drugs": _count_fda_drugs,
+    "active_trials": _count_active_trials,
+    "recent_papers": _count_recent_papers,
+    "news_count": _count_news
+}
+
+
+@cached_fetcher("analytics")
+def fetch_analytics_metric(source: str) -> int:
+    """
+    Fetch a single analytics KPI.
+
+    Raises FetchFailed on upstream failure (see persistent_cache), so that
+    st.cache_data does not cache the miss and the next page load retries
+    only this source.
+    """
+    timeout = config.ANALYTICS_SOURCE_TIMEOUTS.get(source, config.REQUEST_TIMEOUT)
+    with APIClient.silenced():
+        return ANALYTICS_SOURCES[source](timeout)
+
+
+def fetch_analytics_data() -> Dict[str, Optional[int]]:
+    """
+    Fetch data for analytics dashboard.
+
+    All KPI sources are requested concurrently, so a cold load takes about
+    as long as the slowest source. A source that fails or misses its
+    deadline in ANALYTICS_SOURCE_TIMEOUTS is returned as None; the other
+    KPIs are unaffected.
+    """
+    results: Dict[str, Optional[int]] = {}
+    executor = ThreadPoolExecutor(max_workers=len(ANALYTICS_SOURCES), thread_name_prefix="analytics")
+    start = time.monotonic()
+    try:
+        futures = {
+            source: executor.submit(fetch_analytics_metric, source)
+            for source in ANALYTICS_SOURCES
+        }
+        for source, future in futures.items():
+            deadline = start + config.ANALYTICS_SOURCE_TIMEOUTS.get(source, config.REQUEST_TIMEOUT)
+            try:
+                results[source] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                results[source] = None
+    finally:
+        # Don't hold the page on stragglers; they finish (and cache) in the background
+        executor.shutdown(wait=False)
+
+    return results
@@ -0,0 +1,137 @@
+"""
+Persistent, content-addressed cache of chunk embeddings
+
+Vectors live in an append-only float32 matrix on disk, read through a
+memory map; a SQLite table maps sha256(chunk text) to its row. There is one
+cache directory per embedding model, so a chunk that was embedded before by
+the same model (e.g. boilerplate shared between catalog revisions) never
+goes through the model again.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Memory-mapped embedding matrix with a hash index, safe to share between
+    threads and server processes. Appends are serialized with a SQLite
+    write transaction, which also makes the row allocation atomic.
+    """
+
+    def __init__(self, directory: str, model_name: str):
+        self.directory = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.sqlite3")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS vectors (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        row = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(row[0]) if row else None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, needed: int) -> np.memmap:
+        """Memory map covering at least ``needed`` rows, remapped as the file grows"""
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[0] < needed:
+                rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+                self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+            return self._matrix
+
+    def get_many(self, hashes: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors for whichever of ``hashes`` have been seen before"""
+        if not hashes or self.dim is None:
+            return {}
+        found: Dict[str, int] = {}
+        conn = self._connect()
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(conn.execute(f"SELECT hash, row FROM vectors WHERE hash IN ({placeholders})", batch).fetchall())
+        if not found:
+            return {}
+        matrix = self._rows(max(found.values()) + 1)
+        return {h: matrix[row].tolist() for h, row in found.items()}
+
+    def put_many(self, hashes: List[str], vectors: List[List[float]]):
+        """Append new vectors; hashes that are already cached are skipped"""
+        if not hashes:
+            return
+        array = np.asarray(vectors, dtype=np.float32)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.dim is None:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+                self.dim = int(row[0]) if row else array.shape[1]
+                conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            (next_row,) = conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()
+            fresh = []
+            for h, vector in zip(hashes, array):
+                if conn.execute("SELECT 1 FROM vectors WHERE hash = ?", (h,)).fetchone() is None:
+                    fresh.append((h, next_row + len(fresh), vector))
+            if fresh:
+                block = np.stack([vector for _, _, vector in fresh]).astype(np.float32)
+                # Write at the allocated offset (not append) so a torn write from a crashed process is overwritten
+                fd = os.open(self.vectors_path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    os.pwrite(fd, block.tobytes(), next_row * self.dim * 4)
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                conn.executemany("INSERT INTO vectors (hash, row) VALUES (?, ?)", [(h, row) for h, row, _ in fresh])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that looks every chunk up in an EmbeddingCache and
+    only sends unseen chunks to the underlying model.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(hashes)
+
+        missing = list(dict.fromkeys(h for h in hashes if h not in vectors))
+        if missing:
+            text_for = dict(zip(hashes, texts))
+            computed = self.underlying.embed_documents([text_for[h] for h in missing])
+            self.cache.put_many(missing, computed)
+            vectors.update(zip(missing, computed))
+
+        return [list(vectors[h]) for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying.embed_query(text)
@@ -0,0 +1,84 @@
+"""
+Shared sentence-embedding model
+
+The model can run on the default PyTorch backend or on ONNX Runtime
+(optionally int8-quantized) behind the same langchain Embeddings
+interface, and is loaded on a background thread when the server starts.
+Heavy libraries are imported inside the functions, so importing this
+module stays cheap.
+"""
+import threading
+import streamlit as st
+import config
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_warmup_started = False
+_warmup_lock = threading.Lock()
+
+
+def embedding_model_id(backend: str = None) -> str:
+    """Model name plus backend, for keying cached vectors (quantized vectors differ slightly)"""
+    backend = backend or config.EMBEDDING_BACKEND
+    return config.EMBEDDING_MODEL if backend == "torch" else f"{config.EMBEDDING_MODEL}@{backend}"
+
+
+def load_embedding_model(backend: str = None):
+    """
+    Load the sentence-transformers model on ``backend`` (default
+    EMBEDDING_BACKEND), without the on-disk embedding cache.
+    """
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    backend = backend or config.EMBEDDING_BACKEND
+    if backend == "torch":
+        model_kwargs = {"device": "cpu"}
+    elif backend == "onnx":
+        model_kwargs = {"backend": "onnx"}
+    elif backend == "onnx-int8":
+        # Pre-quantized export shipped in the model's Hugging Face repo
+        model_kwargs = {"backend": "onnx", "model_kwargs": {"file_name": config.EMBEDDING_ONNX_INT8_FILE}}
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend!r} (expected one of {BACKENDS})")
+    return HuggingFaceEmbeddings(model_name=config.EMBEDDING_MODEL, model_kwargs=model_kwargs)
+
+
+# Initialize embeddings model only once; no spinner, since the warm-up thread has no page to show it on
+@st.cache_resource(show_spinner=False)
+def get_embeddings_model():
+    from utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+    # Chunks embedded before (by this model and backend) are read from the on-disk cache
+    return CachedEmbeddings(
+        load_embedding_model(),
+        EmbeddingCache(config.EMBEDDING_CACHE_DIR, embedding_model_id())
+    )
+
+
+def _warm_up():
+    try:
+        # One inference as well, so lazy initialisation inside the runtime is done too
+        get_embeddings_model().embed_query("warm-up")
+    except Exception:
+        # The request path loads the model again and reports the error there
+        pass
+
+
+def start_warmup() -> bool:
+    """
+    Load the embedding model on a background thread, once per server
+    process. A request that needs the model meanwhile waits for this load
+    instead of starting its own.
+
+    Returns:
+        True if the warm-up thread was started by this call
+    """
+    global _warmup_started
+    if not config.EMBEDDING_WARMUP:
+        return False
+    with _warmup_lock:
+        if _warmup_started:
+            return False
+        _warmup_started = True
+    threading.Thread(target=_warm_up, name="embedding-warmup", daemon=True).start()
+    return True
@@ -0,0 +1,184 @@
+"""
+Event date extraction for the Events tab
+
+Turns mentions like "March 15-17, 2026", "30 Sept - 2 Oct 2026",
+"November 2026" or "2026-03-15" into start/end dates, so upcoming and
+past events are told apart by comparing with today instead of by a list
+of years. Dates without a year take the year mentioned nearest before
+them in the text (else after them), or the article's publication year.
+Results are memoized per article URL and content hash.
+"""
+import calendar
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date
+from typing import List, Optional, Tuple
+
+# precision: "day", "month" or "year"; text: the matched fragment
+EventDate = namedtuple("EventDate", ["start", "end", "precision", "text"])
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+_DAY = r"\d{1,2}(?!\d)(?:st|nd|rd|th)?"
+_YEAR = r"(?:19|20)\d{2}(?!\d)"
+_TO = r"\s*(?:-|–|—|to|through|until)\s*"
+
+# One pass over the text; alternatives are tried in order at each position
+_DATE_RE = re.compile(
+    # 2026-03-15
+    rf"\b(?P<iso_y>{_YEAR})-(?P<iso_m>\d{{2}})-(?P<iso_d>\d{{2}})\b"
+    # March 15-17, 2026 / March 15 - April 2, 2026 / March 15, 2026 / March 15
+    rf"|\b(?P<a_m1>{_MONTH})\s+(?P<a_d1>{_DAY})(?:{_TO}(?:(?P<a_m2>{_MONTH})\s+)?(?P<a_d2>{_DAY}))?(?:,?\s+(?P<a_y>{_YEAR}))?"
+    # 15-17 March 2026 / 30 Sept - 2 Oct 2026 / 15 March 2026
+    rf"|\b(?P<b_d1>{_DAY})(?:\s+(?P<b_m1>{_MONTH}))?{_TO}(?P<b_d2>{_DAY})\s+(?P<b_m2>{_MONTH}),?\s+(?P<b_y>{_YEAR})"
+    rf"|\b(?P<c_d>{_DAY})\s+(?P<c_m>{_MONTH}),?\s+(?P<c_y>{_YEAR})"
+    # November 2026
+    rf"|\b(?P<d_m>{_MONTH}),?\s+(?P<d_y>{_YEAR})"
+    # 2026
+    rf"|\b(?P<e_y>20\d{{2}})\b",
+    re.IGNORECASE
+)
+
+_YEAR_RE = re.compile(rf"\b{_YEAR}")
+
+_CACHE_SIZE = 10000
+_cache: "OrderedDict[Tuple[str, str], List[EventDate]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _month(name: str) -> int:
+    return MONTHS[name[:3].lower()]
+
+
+def _day(text: str) -> int:
+    return int(re.match(r"\d+", text).group())
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _context_year(position: int, years: List[Tuple[int, int]], reference: date) -> int:
+    """Year for a year-less date at ``position``: the nearest one mentioned before it, else after it"""
+    before = [year for start, year in years if start < position]
+    if before:
+        return before[-1]
+    return years[0][1] if years else reference.year
+
+
+def _day_range(m1: int, d1: int, m2: int, d2: int, year: Optional[int], default_year: int) -> Tuple[date, date]:
+    """Start/end of a (possibly year-less, possibly year-crossing) day range"""
+    if year is None:
+        # The range starts in the year it is read in ("Dec 30 - Jan 2")
+        year = default_year
+        start, end = date(year, m1, d1), date(year, m2, d2)
+        if end < start:
+            end = date(year + 1, m2, d2)
+        return start, end
+    # An explicit year belongs to the end of the range ("Dec 30 - Jan 2, 2027")
+    start, end = date(year, m1, d1), date(year, m2, d2)
+    if end < start:
+        start = date(year - 1, m1, d1)
+    return start, end
+
+
+def extract_event_dates(text: str, reference: date) -> List[EventDate]:
+    """
+    Every date or date range mentioned in ``text``. Dates that have no year
+    take one from the rest of the text, or from ``reference`` (usually the
+    publication date); they are never moved into the following year.
+    """
+    dates = []
+    years = [(match.start(), int(match.group())) for match in _YEAR_RE.finditer(text)]
+    for match in _DATE_RE.finditer(text):
+        g = match.groupdict()
+        try:
+            if g["iso_y"]:
+                day = date(int(g["iso_y"]), int(g["iso_m"]), int(g["iso_d"]))
+                dates.append(EventDate(day, day, "day", match.group()))
+            elif g["a_m1"]:
+                if not g["a_y"] and g["a_m1"].lower() == "may":
+                    # Year-less "may 3" is usually the verb
+                    continue
+                m1, d1 = _month(g["a_m1"]), _day(g["a_d1"])
+                m2 = _month(g["a_m2"]) if g["a_m2"] else m1
+                d2 = _day(g["a_d2"]) if g["a_d2"] else d1
+                start, end = _day_range(
+                    m1, d1, m2, d2, int(g["a_y"]) if g["a_y"] else None,
+                    _context_year(match.start(), years, reference)
+                )
+                dates.append(EventDate(start, end, "day", match.group()))
+            elif g["b_d1"]:
+                m2 = _month(g["b_m2"])
+                m1 = _month(g["b_m1"]) if g["b_m1"] else m2
+                start, end = _day_range(m1, _day(g["b_d1"]), m2, _day(g["b_d2"]), int(g["b_y"]), reference.year)
+                dates.append(EventDate(start, end, "day", match.group()))
+            elif g["c_d"]:
+                day = date(int(g["c_y"]), _month(g["c_m"]), _day(g["c_d"]))
+                dates.append(EventDate(day, day, "day", match.group()))
+            elif g["d_m"]:
+                dates.append(EventDate(*_month_range(int(g["d_y"]), _month(g["d_m"])), "month", match.group()))
+            else:
+                year = int(g["e_y"])
+                dates.append(EventDate(date(year, 1, 1), date(year, 12, 31), "year", match.group()))
+        except ValueError:
+            # "February 30" and the like
+            continue
+    return dates
+
+
+def decisive_dates(dates: List[EventDate], today: date) -> List[EventDate]:
+    """
+    The dates that tell whether an event is upcoming or past: the day-precision
+    ones if there are any, else the month-precision ones, else the bare years
+    other than the current one ("the 2026 summit" says nothing about which
+    part of 2026).
+    """
+    for precision in ("day", "month"):
+        precise = [d for d in dates if d.precision == precision]
+        if precise:
+            return precise
+    return [d for d in dates if not d.start <= today <= d.end]
+
+
+def cached_event_dates(url: str, text: str, reference: date) -> List[EventDate]:
+    """extract_event_dates(), memoized by article URL and a hash of its text and reference date"""
+    key = (url, hashlib.sha1(f"{reference.isoformat()}\n{text}".encode("utf-8")).hexdigest())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    dates = extract_event_dates(text, reference)
+    with _cache_lock:
+        _cache[key] = dates
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return dates
+
+
+def clear_cache():
+    """Forget every memoized extraction"""
+    with _cache_lock:
+        _cache.clear()
+
+
+def format_event_date(event_date: EventDate) -> str:
+    """'Mar 15–17, 2026', 'Sep 30 – Oct 2, 2026', 'Nov 2026' or '2026'"""
+    start, end = event_date.start, event_date.end
+    if event_date.precision == "year":
+        return str(start.year)
+    if event_date.precision == "month":
+        return start.strftime("%b %Y")
+    if start == end:
+        return f"{start:%b} {start.day}, {start.year}"
+    if (start.year, start.month) == (end.year, end.month):
+        return f"{start:%b} {start.day}–{end.day}, {end.year}"
+    if start.year == end.year:
+        return f"{start:%b} {start.day} – {end:%b} {end.day}, {end.year}"
+    return f"{start:%b} {start.day}, {start.year} – {end:%b} {end.day}, {end.year}"
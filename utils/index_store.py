@@ -0,0 +1,77 @@
+"""
+On-disk store of built FAISS indexes for the Company Knowledge tab
+
+Indexes are keyed by a hash of the uploaded file's bytes together with the
+settings that shaped the index (splitter and embedding model), so uploading
+the same document again loads the saved index instead of re-embedding it.
+An index is shared by every session that uploads those bytes, so it holds
+no file name; chunks are named when they join a session's knowledge base.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional
+from langchain_community.vectorstores import FAISS
+import config
+
+
+def index_settings() -> Dict[str, Any]:
+    """Settings that change the content of a built index"""
+    return {
+        "embedding_model": config.EMBEDDING_MODEL,
+        "embedding_backend": config.EMBEDDING_BACKEND,
+        "chunk_size": config.CHUNK_SIZE,
+        "chunk_overlap": config.CHUNK_OVERLAP
+    }
+
+
+def index_key(file_bytes: bytes, file_type: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """Content hash of a document plus the index settings"""
+    settings = settings if settings is not None else index_settings()
+    digest = hashlib.sha256(file_bytes)
+    digest.update(file_type.lower().encode("utf-8"))
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _index_path(key: str) -> str:
+    return os.path.join(config.KNOWLEDGE_INDEX_DIR, key)
+
+
+def has_index(key: str) -> bool:
+    return os.path.exists(os.path.join(_index_path(key), "index.faiss"))
+
+
+def load_index(key: str, embeddings) -> Optional[FAISS]:
+    """Load a saved index, or None if this document has not been indexed"""
+    if not has_index(key):
+        return None
+    try:
+        # Only indexes this app wrote itself are ever loaded from this directory
+        return FAISS.load_local(_index_path(key), embeddings, allow_dangerous_deserialization=True)
+    except Exception:
+        return None
+
+
+def save_index(key: str, vector_store: FAISS, metadata: Optional[Dict[str, Any]] = None):
+    """
+    Save an index under ``key``. Written to a temporary directory first and
+    then renamed, so concurrent readers never see a half-written index.
+    """
+    os.makedirs(config.KNOWLEDGE_INDEX_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=config.KNOWLEDGE_INDEX_DIR, prefix=".tmp-")
+    try:
+        vector_store.save_local(tmp_dir)
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({**(metadata or {}), **index_settings(), "created": time.time()}, f)
+        try:
+            os.replace(tmp_dir, _index_path(key))
+        except OSError:
+            # Another process saved the same document first; keep theirs
+            pass
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
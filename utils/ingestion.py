@@ -0,0 +1,137 @@
+"""
+Streaming document ingestion for the Company Knowledge tab
+
+Pages are parsed in a process pool a few batches ahead of the consumer,
+split into chunks as they arrive and embedded in fixed-size batches that
+are appended to the FAISS index. Only a bounded window of pages and one
+embedding batch are held in memory at a time, whatever the document size.
+"""
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from utils.pdf_pages import page_count, extract_pages
+import config
+
+# progress(fraction_done, message)
+ProgressCallback = Callable[[float, str], None]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all uploads in this server process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking the multi-threaded Streamlit server is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=config.INGEST_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def iter_pdf_pages(path: str) -> Iterator[Tuple[float, Document]]:
+    """Yield (fraction_done, page) for a PDF, in page order"""
+    total = page_count(path)
+    step = config.INGEST_PAGES_PER_TASK
+    ranges = [(start, start + step) for start in range(0, total, step)]
+
+    if total < config.INGEST_PARALLEL_MIN_PAGES:
+        results = (extract_pages(path, start, stop) for start, stop in ranges)
+    else:
+        results = _ordered_window(get_process_pool(), path, ranges)
+
+    for pages in results:
+        for number, text in pages:
+            yield (number + 1) / total, Document(page_content=text, metadata={"page": number})
+
+
+def _ordered_window(pool: ProcessPoolExecutor, path: str, ranges: List[Tuple[int, int]]) -> Iterator[list]:
+    """Run page ranges on the pool, keeping at most a few tasks ahead of the consumer"""
+    window = deque()
+    pending = iter(ranges)
+    for start, stop in pending:
+        window.append(pool.submit(extract_pages, path, start, stop))
+        if len(window) >= config.INGEST_WORKERS * 2:
+            break
+    while window:
+        pages = window.popleft().result()
+        next_range = next(pending, None)
+        if next_range is not None:
+            window.append(pool.submit(extract_pages, path, *next_range))
+        yield pages
+
+
+def iter_text_pages(path: str) -> Iterator[Tuple[float, Document]]:
+    """Yield (fraction_done, block) for a text file, read in blocks of lines"""
+    total = max(os.path.getsize(path), 1)
+    read = 0
+    lines: List[str] = []
+    size = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            lines.append(line)
+            size += len(line)
+            if size >= config.INGEST_TEXT_BLOCK_CHARS:
+                read += size
+                yield min(read / total, 1.0), Document(page_content="".join(lines))
+                lines, size = [], 0
+    if lines:
+        yield 1.0, Document(page_content="".join(lines))
+
+
+def build_vector_store(
+    path: str,
+    embeddings,
+    progress: Optional[ProgressCallback] = None
+) -> Tuple[Optional[FAISS], int]:
+    """
+    Stream a PDF or text file into a new FAISS index.
+
+    Returns:
+        (vector store or None if the document had no text, number of chunks)
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP
+    )
+    pages = iter_pdf_pages(path) if path.lower().endswith(".pdf") else iter_text_pages(path)
+
+    vector_store: Optional[FAISS] = None
+    batch: List[Document] = []
+    chunk_count = 0
+
+    def flush():
+        nonlocal vector_store
+        texts = [doc.page_content for doc in batch]
+        metadatas = [doc.metadata for doc in batch]
+        text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+        if vector_store is None:
+            vector_store = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas)
+        else:
+            vector_store.add_embeddings(text_embeddings, metadatas=metadatas)
+        batch.clear()
+
+    for fraction, page in pages:
+        for chunk in splitter.split_documents([page]):
+            batch.append(chunk)
+            chunk_count += 1
+            if len(batch) >= config.EMBEDDING_BATCH_SIZE:
+                flush()
+        if progress:
+            progress(fraction, f"Indexed {chunk_count} chunks")
+
+    if batch:
+        flush()
+    if progress:
+        progress(1.0, f"Indexed {chunk_count} chunks")
+
+    return vector_store, chunk_count
@@ -0,0 +1,96 @@
+"""
+Compiled multi-keyword matcher
+
+All keywords of all groups are compiled into one regex shaped like a
+trie (e.g. ``pharma(?:ceutical)?``), so a single scan of a text finds
+every keyword it contains, in C. Matching is by substring, like
+``keyword in text``. The scan returns the longest keyword at each match
+and skips past it, so two precomputed tables recover what it steps over:
+the keywords contained in a match ("conference" in "international
+conference"), and the offsets inside a match where another keyword may
+start and run past its end ("event date" after "in-person event").
+
+For keyword lists of a few dozen entries a cold scan is not faster than
+one ``in`` test per keyword; the speed-up comes from the per-text memo,
+so ``cache_size`` should cover the texts that are scored repeatedly.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy, so the longest keyword starting at a position wins
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds which keywords of each group occur in a text, in one pass.
+    Per-text group counts are memoized (``cache_size`` texts), so texts
+    seen again, e.g. the same articles on every Streamlit rerun, are not
+    rescanned.
+    """
+
+    def __init__(self, groups: Dict[str, List[str]], cache_size: int = 4096):
+        self.cache_size = cache_size
+        self.groups = {group: list(dict.fromkeys(keywords)) for group, keywords in groups.items()}
+        # keyword -> groups it belongs to (a keyword may be in several)
+        self.keyword_groups: Dict[str, List[str]] = {}
+        for group, keywords in self.groups.items():
+            for keyword in keywords:
+                self.keyword_groups.setdefault(keyword, []).append(group)
+        keywords = list(self.keyword_groups)
+        # keyword -> every keyword that is a substring of it (itself included)
+        self._contained: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(other for other in keywords if other in keyword)
+            for keyword in keywords
+        }
+        # keyword -> offsets where a suffix of it is a proper prefix of another keyword
+        self._overlaps: Dict[str, List[int]] = {
+            keyword: [
+                offset for offset in range(1, len(keyword))
+                if any(len(other) > len(keyword) - offset and other.startswith(keyword[offset:]) for other in keywords)
+            ]
+            for keyword in keywords
+        }
+        self._regex = re.compile(_trie_pattern(keywords))
+        self.counts = lru_cache(maxsize=cache_size)(self._counts)
+
+    def keywords_in(self, text: str) -> Set[str]:
+        """Every keyword that is a substring of ``text``"""
+        found: Set[str] = set()
+        match_at = self._regex.match
+        for match in self._regex.finditer(text):
+            keyword = match.group()
+            found |= self._contained[keyword]
+            for offset in self._overlaps[keyword]:
+                crossing = match_at(text, match.start() + offset)
+                if crossing is not None:
+                    found |= self._contained[crossing.group()]
+        return found
+
+    def _counts(self, text: str) -> Dict[str, int]:
+        """
+        Number of distinct keywords of each group found in ``text``.
+        Called as ``counts(text)``; the returned dict is shared, do not modify it.
+        """
+        counts = dict.fromkeys(self.groups, 0)
+        for keyword in self.keywords_in(text):
+            for group in self.keyword_groups[keyword]:
+                counts[group] += 1
+        return counts
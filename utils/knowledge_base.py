@@ -0,0 +1,190 @@
+"""
+Multi-document knowledge base for the Company Knowledge tab
+"""
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+from utils.ann_index import append_store, remove_from_store, reindex, index_type_of, search_index
+from utils.bm25 import BM25Index, reciprocal_rank_fusion
+from utils.conversation import count_tokens
+import config
+
+
+class KnowledgeBase:
+    """
+    Several documents sharing one FAISS index.
+
+    Each document's index is built (or loaded from the index store) on its
+    own and merged in, so adding a document never re-embeds the others and
+    removing one deletes only its vectors. Chunk metadata keeps the source
+    file name and page, so answers can cite where they came from.
+
+    The combined index is rebuilt on the type utils.ann_index picks for its
+    size (flat, HNSW, IVF-Flat or IVF-PQ) whenever a change crosses a
+    threshold.
+
+    A BM25 index over the same chunks is kept alongside, and search() fuses
+    the lexical and vector rankings.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.vector_store: Optional[FAISS] = None
+        # doc_id (content hash) -> {"name", "chunks", "ids", "added"}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.lexical = BM25Index()
+        # Bumped on every change, so anything built over the knowledge base can tell it is stale
+        self.version = 0
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.documents
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def add_document(self, doc_id: str, name: str, doc_store: FAISS) -> bool:
+        """
+        Append a document's vectors to the knowledge base. Its chunks are
+        cited as ``name``: the saved index is shared by everyone who uploads
+        the same bytes, so it does not keep a file name of its own.
+
+        Returns:
+            False if the document was already in the knowledge base
+        """
+        if doc_id in self.documents:
+            return False
+        ids = list(doc_store.index_to_docstore_id.values())
+        chunks = [doc_store.docstore.search(chunk_id) for chunk_id in ids]
+        for chunk in chunks:
+            chunk.metadata["source"] = name
+        self.lexical.add(ids, [chunk.page_content for chunk in chunks])
+        if self.vector_store is None:
+            self.vector_store = doc_store
+        else:
+            self.vector_store = append_store(self.vector_store, doc_store)
+        self.documents[doc_id] = {"name": name, "chunks": len(ids), "ids": ids, "added": time.time()}
+        self.vector_store = reindex(self.vector_store)
+        self.version += 1
+        return True
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Delete a document's vectors, leaving every other document's in place"""
+        document = self.documents.pop(doc_id, None)
+        if document is None:
+            return False
+        self.lexical.remove(document["ids"])
+        if not self.documents:
+            self.vector_store = None
+        else:
+            self.vector_store = reindex(remove_from_store(self.vector_store, document["ids"]))
+        self.version += 1
+        return True
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Documents in the order they were added"""
+        return [
+            {"id": doc_id, "name": doc["name"], "chunks": doc["chunks"]}
+            for doc_id, doc in sorted(self.documents.items(), key=lambda item: item[1]["added"])
+        ]
+
+    @property
+    def index_type(self) -> Optional[str]:
+        return index_type_of(self.vector_store.index) if self.vector_store is not None else None
+
+    def vector_search(self, query_vector: np.ndarray, k: int, score_threshold: float) -> List[str]:
+        """Ids of the ``k`` nearest chunks with cosine similarity of at least ``score_threshold``"""
+        if self.vector_store is None:
+            return []
+        distances, positions = search_index(self.vector_store.index, query_vector[None, :], k, self._chunk_vectors)
+        # Unit vectors: squared L2 distance = 2 - 2 * cosine similarity
+        max_distance = 2 - 2 * score_threshold
+        return [
+            self.vector_store.index_to_docstore_id[position]
+            for distance, position in zip(distances[0], positions[0])
+            if position != -1 and distance <= max_distance
+        ]
+
+    def _chunk_vectors(self, positions: np.ndarray) -> np.ndarray:
+        """Full vectors of the chunks at these index positions, from the embedding cache"""
+        texts = [
+            self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(position)]).page_content
+            for position in positions
+        ]
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _mmr(self, query_vector: np.ndarray, candidates: List[Document], k: int, lambda_mult: float) -> List[Document]:
+        """Maximal marginal relevance selection of ``k`` of the candidates"""
+        # Chunk vectors come from the embedding cache, not the model
+        vectors = np.asarray(self.embeddings.embed_documents([doc.page_content for doc in candidates]), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        query = query_vector / (np.linalg.norm(query_vector) + 1e-12)
+        relevance = vectors @ query
+        selected: List[int] = []
+        remaining = list(range(len(candidates)))
+        while remaining and len(selected) < k:
+            if selected:
+                redundancy = (vectors[remaining] @ vectors[selected].T).max(axis=1)
+            else:
+                redundancy = np.zeros(len(remaining))
+            scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+            selected.append(remaining.pop(int(np.argmax(scores))))
+        return [candidates[i] for i in selected]
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        mmr: Optional[bool] = None,
+        mmr_lambda: Optional[float] = None,
+        score_threshold: Optional[float] = None,
+        max_context_tokens: Optional[int] = None,
+        lexical_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """
+        Hybrid retrieval: BM25 and vector rankings merged by reciprocal rank
+        fusion, optionally re-ranked with MMR, then cut to ``k`` chunks and
+        to ``max_context_tokens``. A chunk is only fused in if its cosine
+        similarity reaches ``score_threshold`` or its BM25 score reaches
+        ``lexical_threshold``, so nothing is returned when neither ranking
+        finds a related chunk. Unset options default to the RETRIEVAL_*
+        settings.
+        """
+        k = k or config.RETRIEVAL_K
+        mmr = config.RETRIEVAL_USE_MMR if mmr is None else mmr
+        mmr_lambda = config.RETRIEVAL_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        score_threshold = config.RETRIEVAL_SCORE_THRESHOLD if score_threshold is None else score_threshold
+        max_context_tokens = max_context_tokens or config.RETRIEVAL_MAX_CONTEXT_TOKENS
+        lexical_threshold = config.RETRIEVAL_LEXICAL_THRESHOLD if lexical_threshold is None else lexical_threshold
+        if self.vector_store is None:
+            return []
+
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        lexical = [
+            chunk_id for chunk_id, score in self.lexical.search(query, config.RETRIEVAL_FETCH_K)
+            if score >= lexical_threshold
+        ]
+        semantic = self.vector_search(query_vector, config.RETRIEVAL_FETCH_K, score_threshold)
+        fused = reciprocal_rank_fusion([lexical, semantic])
+        if mmr:
+            docs = self._mmr(query_vector, [self.vector_store.docstore.search(chunk_id) for chunk_id in fused], k, mmr_lambda)
+        else:
+            docs = [self.vector_store.docstore.search(chunk_id) for chunk_id in fused[:k]]
+
+        # The best chunk is always kept, even if it alone exceeds the budget
+        selected, used = [], 0
+        for doc in docs:
+            used += count_tokens(doc.page_content)
+            if selected and used > max_context_tokens:
+                break
+            selected.append(doc)
+        return selected
+
+
+def format_citation(metadata: Dict[str, Any]) -> str:
+    """'catalog.pdf, p. 3' style reference for a retrieved chunk"""
+    source = metadata.get("source", "Unknown document")
+    if "page" in metadata:
+        return f"{source}, p. {int(metadata['page']) + 1}"
+    return source
@@ -0,0 +1,378 @@
+"""
+Local full-text news store
+
+A background ingester polls config.NEWS_INGEST_QUERIES from NewsAPI into
+a SQLite FTS5 index (one row per article URL), and the news pages search
+that index first. Matches are ranked by BM25 weighted by recency, so a
+typed search costs milliseconds and no NewsAPI quota. Searches the store
+cannot answer (too few hits, or no recent ingest) go to NewsAPI, and
+their results are added to the store as well. The ingester stays idle
+while nobody searches, so an unused server spends no quota.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from utils.api_client import APIClient
+import config
+
+# Column weights for bm25(): title, description, content
+_BM25_WEIGHTS = (10.0, 3.0, 1.0)
+_TERM_RE = re.compile(r'[-+]?"[^"]*"|\S+')
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Translate a search box entry into an FTS5 query with NewsAPI's
+    meaning. Words must all match, "quoted phrases" stay phrases, OR is
+    kept, and ``-word`` / ``NOT word`` exclude matches (FTS5 NOT); AND and
+    ``+`` are implied. None if nothing is searchable, or for parenthesised
+    queries, whose grouping is left to NewsAPI.
+    """
+    if "(" in text or ")" in text:
+        return None
+    include: List[str] = []
+    exclude: List[str] = []
+    negate_next = False
+    for term in _TERM_RE.findall(text):
+        if term == "OR":
+            if include and include[-1] != "OR":
+                include.append("OR")
+            continue
+        if term == "AND":
+            continue
+        if term == "NOT":
+            negate_next = True
+            continue
+        negate = negate_next or term.startswith("-")
+        negate_next = False
+        words = re.findall(r"\w+", term)
+        if not words:
+            continue
+        phrase = '"' + " ".join(words) + '"'
+        if negate:
+            exclude.append(phrase)
+        else:
+            include.append(phrase)
+    while include and include[-1] == "OR":
+        include.pop()
+    if not include:
+        # FTS5 (like NewsAPI) cannot search for exclusions alone
+        return None
+    match = " ".join(include)
+    if exclude:
+        match = f"({match}) NOT ({' OR '.join(exclude)})"
+    return match
+
+
+def _published_ts(article: Dict[str, Any]) -> Optional[float]:
+    try:
+        return datetime.fromisoformat((article.get("publishedAt") or "").replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class NewsStore:
+    """
+    SQLite FTS5 article index shared by every process on the host.
+
+    Uses WAL journaling and one connection per thread, like the fetch cache.
+    Articles keep their NewsAPI shape (stored as JSON), so search results
+    render exactly like live ones.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                content TEXT NOT NULL,
+                published_at REAL NOT NULL,
+                ingested_at REAL NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published_at);
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, description, content,
+                content='articles', content_rowid='id', tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, description, content)
+                VALUES (new.id, new.title, new.description, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, description, content)
+                VALUES ('delete', old.id, old.title, old.description, old.content);
+            END;
+            CREATE TABLE IF NOT EXISTS ingest_runs (
+                query TEXT PRIMARY KEY,
+                claimed_at REAL NOT NULL,
+                ingested_at REAL,
+                articles INTEGER NOT NULL DEFAULT 0
+            );
+            """
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_articles(self, articles: Iterable[Dict[str, Any]]) -> int:
+        """Store articles not seen before (by URL). Returns how many were new."""
+        now = time.time()
+        rows = []
+        for article in articles:
+            url = article.get("url")
+            published_at = _published_ts(article)
+            if not url or published_at is None or article.get("title") == "[Removed]":
+                continue
+            rows.append((
+                url,
+                article.get("title") or "",
+                article.get("description") or "",
+                article.get("content") or "",
+                published_at,
+                now,
+                json.dumps(article, separators=(",", ":"))
+            ))
+        if not rows:
+            return 0
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO articles (url, title, description, content, published_at, ingested_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return cursor.rowcount
+
+    def prune(self, max_age_days: float = config.NEWS_STORE_MAX_AGE_DAYS) -> int:
+        """Drop articles published more than ``max_age_days`` ago"""
+        cursor = self._connect().execute(
+            "DELETE FROM articles WHERE published_at < ?", (time.time() - max_age_days * 86400,)
+        )
+        return cursor.rowcount
+
+    def search(self, query: str, limit: int = 10, max_age_days: float = config.NEWS_STORE_MAX_AGE_DAYS) -> List[Dict[str, Any]]:
+        """
+        Articles matching ``query``, best first. The top NEWS_STORE_CANDIDATES
+        BM25 matches are re-ranked by BM25 relevance halved every
+        NEWS_STORE_RECENCY_HALF_LIFE_DAYS of article age.
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        now = time.time()
+        try:
+            rows = self._connect().execute(
+                "SELECT a.payload, a.published_at, bm25(articles_fts, ?, ?, ?) AS score "
+                "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+                "WHERE articles_fts MATCH ? AND a.published_at >= ? "
+                "ORDER BY score LIMIT ?",
+                (*_BM25_WEIGHTS, match, now - max_age_days * 86400, config.NEWS_STORE_CANDIDATES)
+            ).fetchall()
+        except sqlite3.OperationalError:
+            # Query FTS5 still cannot parse
+            return []
+        half_life = config.NEWS_STORE_RECENCY_HALF_LIFE_DAYS * 86400
+        # bm25() is negative, more negative meaning more relevant
+        ranked = sorted(
+            rows,
+            key=lambda row: -row[2] * math.pow(0.5, max(now - row[1], 0) / half_life),
+            reverse=True
+        )
+        return [json.loads(payload) for payload, _, _ in ranked[:limit]]
+
+    def claim_query(self, query: str, interval: float) -> bool:
+        """
+        Claim an ingest of ``query`` unless some process claimed it within
+        the last ``interval`` seconds, so concurrent servers poll each query
+        once per interval between them.
+        """
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO ingest_runs (query, claimed_at) VALUES (?, ?) "
+            "ON CONFLICT(query) DO UPDATE SET claimed_at = excluded.claimed_at "
+            "WHERE ingest_runs.claimed_at <= ?",
+            (query, now, now - interval)
+        )
+        return cursor.rowcount == 1
+
+    def record_ingest(self, query: str, articles: int):
+        self._connect().execute(
+            "UPDATE ingest_runs SET ingested_at = ?, articles = ? WHERE query = ?",
+            (time.time(), articles, query)
+        )
+
+    def release_query(self, query: str, retry_after: float, interval: float):
+        """After a failed ingest, let ``query`` be claimed again in ``retry_after`` seconds"""
+        self._connect().execute(
+            "UPDATE ingest_runs SET claimed_at = ? WHERE query = ?",
+            (time.time() - interval + retry_after, query)
+        )
+
+    def last_ingest(self) -> Optional[float]:
+        """Unix time of the most recent successful ingest of any query"""
+        return self._connect().execute("SELECT MAX(ingested_at) FROM ingest_runs").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        return {
+            "articles": conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0],
+            "last_ingest": self.last_ingest(),
+            "queries": {
+                query: {"ingested_at": ingested_at, "articles": articles}
+                for query, ingested_at, articles in conn.execute(
+                    "SELECT query, ingested_at, articles FROM ingest_runs ORDER BY query"
+                )
+            }
+        }
+
+
+class NewsIngester:
+    """Polls a set of NewsAPI queries into a NewsStore on a daemon thread"""
+
+    def __init__(
+        self,
+        store: NewsStore,
+        fetch: Callable[[str, int], Optional[List[Dict[str, Any]]]],
+        queries: List[str],
+        interval: float = config.NEWS_INGEST_INTERVAL,
+        page_size: int = config.NEWS_INGEST_PAGE_SIZE
+    ):
+        self.store = store
+        self.fetch = fetch
+        self.queries = queries
+        self.interval = interval
+        self.page_size = page_size
+        self._stop = threading.Event()
+
+    def run_once(self) -> int:
+        """Ingest every query that is due. Returns the number of new articles."""
+        added = 0
+        for query in self.queries:
+            if not self.store.claim_query(query, self.interval):
+                continue
+            try:
+                with APIClient.silenced():
+                    articles = self.fetch(query, self.page_size)
+            except Exception:
+                articles = None
+            if articles is None:
+                self.store.release_query(query, config.REFRESH_RETRY_AFTER, self.interval)
+                continue
+            new = self.store.add_articles(articles)
+            self.store.record_ingest(query, new)
+            added += new
+        self.store.prune()
+        return added
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if time.time() - _last_search < config.NEWS_INGEST_IDLE_AFTER:
+                    self.run_once()
+            except Exception:
+                # A locked or unwritable store; try again at the next check
+                pass
+            self._stop.wait(config.NEWS_INGEST_CHECK_EVERY)
+
+    def stop(self):
+        self._stop.set()
+
+
+_store: Optional[NewsStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+_ingester: Optional[NewsIngester] = None
+_last_search = 0.0  # unix time of this process's latest news search
+
+
+def get_news_store() -> Optional[NewsStore]:
+    """The configured store, or None when disabled or SQLite lacks FTS5"""
+    global _store, _store_failed
+    if not config.NEWS_STORE_ENABLED or _store_failed:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(config.NEWS_STORE_PATH)), exist_ok=True)
+                    _store = NewsStore(config.NEWS_STORE_PATH)
+                except sqlite3.OperationalError:
+                    _store_failed = True
+    return _store
+
+
+def search_local(query: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """
+    Answer a news search from the store, or None when it cannot: the store
+    is unavailable, nothing was ingested within NEWS_STORE_MAX_STALENESS,
+    the query cannot be translated, or it has fewer than ``limit`` matches.
+    Also keeps the ingester of this process polling (see NEWS_INGEST_IDLE_AFTER).
+    """
+    global _last_search
+    _last_search = time.time()
+    store = get_news_store()
+    if store is None:
+        return None
+    last_ingest = store.last_ingest()
+    if last_ingest is None or time.time() - last_ingest > config.NEWS_STORE_MAX_STALENESS:
+        return None
+    if fts_query(query) is None:
+        return None
+    articles = store.search(query, limit)
+    if len(articles) < limit:
+        return None
+    return articles
+
+
+def remember(articles: Optional[List[Dict[str, Any]]]) -> int:
+    """Add articles fetched live from NewsAPI to the store"""
+    store = get_news_store()
+    if store is None or not articles:
+        return 0
+    try:
+        return store.add_articles(articles)
+    except sqlite3.OperationalError:
+        # Store busy; these articles will come back with the next ingest
+        return 0
+
+
+def start_ingester() -> bool:
+    """
+    Start polling NEWS_INGEST_QUERIES in the background, once per server
+    process. Between processes, each query is polled once per interval.
+
+    Returns:
+        True if the ingester was started by this call
+    """
+    global _ingester
+    store = get_news_store()
+    if store is None or not config.NEWS_INGEST_QUERIES:
+        return False
+    with _store_lock:
+        if _ingester is not None:
+            return False
+        # Imported here: data_fetchers searches this store
+        from utils.data_fetchers import search_newsapi
+        _ingester = NewsIngester(store, search_newsapi, config.NEWS_INGEST_QUERIES)
+    threading.Thread(target=_ingester.run_forever, name="news-ingester", daemon=True).start()
+    return True
@@ -0,0 +1,18 @@
+"""
+PDF page extraction run inside ingestion worker processes
+
+Kept free of heavy imports so spawned workers start quickly.
+"""
+from typing import List, Tuple
+from pypdf import PdfReader
+
+
+def page_count(path: str) -> int:
+    """Number of pages in a PDF"""
+    return len(PdfReader(path).pages)
+
+
+def extract_pages(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Extract the text of pages [start, stop) as (page_number, text) pairs"""
+    reader = PdfReader(path)
+    return [(number, reader.pages[number].extract_text() or "") for number in range(start, min(stop, len(reader.pages)))]
@@ -0,0 +1,141 @@
+"""
+Per-host token-bucket rate limiting for upstream APIs
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+import config
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header (delay in seconds or an HTTP-date) into a
+    number of seconds to wait. Returns None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out tokens in arrival order.
+
+    Callers queue FIFO, so a burst from one session cannot starve another.
+    A server-imposed pause (Retry-After) blocks the whole bucket.
+    """
+
+    def __init__(self, requests: float, per: float, burst: Optional[float] = None):
+        self.rate = requests / per  # tokens per second
+        self.capacity = burst if burst is not None else requests
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _expected_wait(self, now: float, position: int) -> float:
+        """Seconds until the caller at ``position`` in the queue gets a token"""
+        shortfall = position + 1 - self._tokens
+        return max(self._blocked_until - now, shortfall / self.rate if shortfall > 0 else 0.0)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a token. Returns False straight away if the expected wait
+        is longer than ``timeout`` (e.g. a daily quota is used up).
+        """
+        ticket = object()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self._expected_wait(now, self._queue.index(ticket))
+                    # Enough tokens for everyone ahead of us as well as ourselves
+                    if wait <= 0:
+                        self._tokens -= 1
+                        return True
+                    if deadline is not None:
+                        if now + wait > deadline:
+                            return False
+                        wait = min(wait, deadline - now)
+                    self._cond.wait(max(wait, 0.01))
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def block_for(self, seconds: float):
+        """Pause the bucket, e.g. for the duration of a 429 Retry-After"""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._cond.notify_all()
+
+    def state(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "tokens": round(self._tokens, 2),
+                "capacity": self.capacity,
+                "rate_per_sec": self.rate,
+                "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+                "queued": len(self._queue)
+            }
+
+
+class RateLimiter:
+    """One TokenBucket per upstream host, configured from config.RATE_LIMITS"""
+
+    def __init__(self, limits: Dict[str, Dict[str, float]] = config.RATE_LIMITS):
+        self.limits = limits
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> Optional[TokenBucket]:
+        """Bucket for the host serving ``url``, or None if the host is unlimited"""
+        host = (urlsplit(url).hostname or "").lower()
+        if host not in self.limits:
+            return None
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(**self.limits[host])
+            return self._buckets[host]
+
+    def acquire(self, url: str, timeout: Optional[float] = config.RATE_LIMIT_MAX_WAIT) -> bool:
+        bucket = self.bucket(url)
+        return bucket.acquire(timeout) if bucket else True
+
+    def block_for(self, url: str, seconds: float):
+        bucket = self.bucket(url)
+        if bucket:
+            bucket.block_for(seconds)
+
+    def state(self) -> Dict[str, Dict[str, Any]]:
+        """Current token state of every host that has been called"""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.state() for host, bucket in buckets.items()}
+
+
+# Shared by every APIClient request in the process
+rate_limiter = RateLimiter()
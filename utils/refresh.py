@@ -0,0 +1,65 @@
+"""
+Background refresh of expired cache entries
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Set
+from utils.api_client import APIClient
+import config
+
+
+class RefreshScheduler:
+    """
+    Runs cache refreshes on a small worker pool, off the script thread.
+
+    A key is refreshed by at most one worker at a time. When a refresh fails
+    the key is left alone for REFRESH_RETRY_AFTER seconds so a failing
+    upstream is not hammered by every page view that sees the stale entry.
+    """
+
+    def __init__(self, max_workers: int = config.REFRESH_WORKERS, retry_after: float = config.REFRESH_RETRY_AFTER):
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-refresh")
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._failed_at: Dict[str, float] = {}
+
+    def schedule(self, key: str, refresh: Callable[[], bool]) -> bool:
+        """
+        Queue ``refresh`` for ``key`` unless it is already queued or cooling
+        down after a failure. ``refresh`` returns True on success.
+
+        Returns:
+            True if a refresh was queued
+        """
+        with self._lock:
+            if key in self._pending:
+                return False
+            failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.time() - failed_at < self.retry_after:
+                return False
+            self._pending.add(key)
+        self._executor.submit(self._run, key, refresh)
+        return True
+
+    def _run(self, key: str, refresh: Callable[[], bool]):
+        try:
+            with APIClient.silenced():
+                succeeded = refresh()
+        except Exception:
+            succeeded = False
+        with self._lock:
+            self._pending.discard(key)
+            if succeeded:
+                self._failed_at.pop(key, None)
+            else:
+                self._failed_at[key] = time.time()
+
+    def pending(self) -> int:
+        """Number of refreshes queued or running"""
+        with self._lock:
+            return len(self._pending)
+
+
+scheduler = RefreshScheduler()
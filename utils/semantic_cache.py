@@ -0,0 +1,95 @@
+"""
+Semantic answer cache for the chatbot
+
+Questions are embedded and compared by cosine similarity with the
+questions answered before, so "What is metformin used for?" and "what's
+metformin used for" share one LLM call. Entries expire after a TTL and
+the least recently used ones are evicted beyond a size limit.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+import config
+
+
+def question_with_context(question: str, chat_history: List[dict]) -> str:
+    """
+    Text that is embedded for a question. The previous user turn is
+    included, so a follow-up like "what are its side effects?" only matches
+    the same follow-up to the same topic.
+    """
+    previous = [msg["content"] for msg in chat_history if msg["role"] == "user"]
+    if previous and previous[-1] == question:
+        previous = previous[:-1]
+    if not previous:
+        return question
+    return f"Previous question: {previous[-1]}\nQuestion: {question}"
+
+
+class SemanticCache:
+    """Thread-safe similarity cache of question -> answer"""
+
+    def __init__(
+        self,
+        embed: Callable[[str], List[float]],
+        threshold: float = None,
+        ttl: float = None,
+        max_entries: int = None
+    ):
+        self.embed = embed
+        self.threshold = config.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = config.SEMANTIC_CACHE_TTL if ttl is None else ttl
+        self.max_entries = config.SEMANTIC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        # entry id -> (unit vector, question, answer, stored_at); order is LRU -> MRU
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._next_id = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def vector(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed(text), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _expire(self, now: float):
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry[3] > self.ttl]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        self.counters["expirations"] += len(expired)
+
+    def get(self, vector: np.ndarray) -> Optional[str]:
+        """Answer of the most similar cached question at or above the threshold"""
+        with self._lock:
+            self._expire(time.time())
+            if self._entries:
+                ids = list(self._entries)
+                similarities = np.stack([self._entries[entry_id][0] for entry_id in ids]) @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(ids[best])
+                    self.counters["hits"] += 1
+                    return self._entries[ids[best]][2]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, vector: np.ndarray, question: str, answer: str):
+        with self._lock:
+            self._entries[self._next_id] = (vector, question, answer, time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "hit_rate": self.counters["hits"] / lookups if lookups else 0.0
+            }
@@ -0,0 +1,60 @@
+"""
+Single-flight coalescing of identical concurrent calls
+"""
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    """One in-flight call and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Ensures only one call per key is in flight at a time.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running block until it finishes and receive the same
+    result, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+    def in_flight(self) -> Dict[str, int]:
+        """Keys currently being fetched and how many callers wait on each"""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}